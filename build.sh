@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+# Render build command: minified Tailwind build, then hashed and
+# precompressed static files, then migrations.
+set -o errexit
+
+pip install -r requirements.txt
+npm ci
+npm run build
+python manage.py collectstatic --no-input
+python manage.py migrate
@@ -13,4 +13,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.utils.live_availability import STREAM_PATH, stream_availability  # noqa: E402 (needs the app registry)
+
+
+async def application(scope, receive, send):
+    # Live availability streams bypass Django's request handling so that
+    # thousands of idle connections don't each hold a worker thread.
+    if scope["type"] == "http" and scope["method"] == "GET":
+        match = STREAM_PATH.match(scope["path"])
+        if match:
+            return await stream_availability(scope, receive, send, match["public_url"])
+    return await django_application(scope, receive, send)
@@ -73,6 +73,10 @@ ACCOUNT_FORMS = {
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.QueryLogMiddleware',
+    'core.db_router.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -80,13 +84,14 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     "allauth.account.middleware.AccountMiddleware",
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.timed_backends.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -109,6 +114,87 @@ DATABASES = {
     'default': dj_database_url.config(default=os.getenv("DATABASE_URL"))
 }
 
+# Optional read replica for public availability, exports and the monitor
+# (see core.db_router). Tests mirror it onto the default test database, so
+# a local setup only needs REPLICA_DATABASE_URL pointing at a second database.
+
+if os.getenv("REPLICA_DATABASE_URL"):
+    DATABASES['replica'] = {
+        **dj_database_url.parse(os.getenv("REPLICA_DATABASE_URL")),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+REPLICA_LAG_TOLERANCE_SECONDS = int(os.getenv("REPLICA_LAG_TOLERANCE_SECONDS", "5"))
+
+
+# Cache
+# Without REDIS_URL each process has its own cache, so only what can be
+# recomputed (rendered editor fragments) is cached there.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Create wizard drafts: steps are written to WizardDraft and each list item to
+# its own WizardDraftItem row. Reads come from the cache only when it is shared
+# between processes (WIZARD_DRAFT_CACHE, on with REDIS_URL). Untouched drafts
+# expire after WIZARD_DRAFT_TTL_HOURS.
+
+WIZARD_DRAFT_TTL_HOURS = int(os.getenv("WIZARD_DRAFT_TTL_HOURS", "48"))
+WIZARD_DRAFT_CACHE = bool(os.getenv("REDIS_URL"))
+
+# Rendered editor lists, keyed by BookingPage.version (see core.utils.fragment_cache).
+
+SETTINGS_FRAGMENT_CACHE_SECONDS = int(os.getenv("SETTINGS_FRAGMENT_CACHE_SECONDS", "86400"))
+
+# Requests over these limits are logged by core.middleware.QueryLogMiddleware;
+# per-URL budgets are enforced by `python manage.py check_query_budgets`.
+
+QUERY_LOG_COUNT_THRESHOLD = int(os.getenv("QUERY_LOG_COUNT_THRESHOLD", "30"))
+QUERY_LOG_DUPLICATE_THRESHOLD = int(os.getenv("QUERY_LOG_DUPLICATE_THRESHOLD", "5"))
+
+# Per-request phase timings (core.middleware.RequestTimingMiddleware). Sessions
+# and templates go through the timed backends in core.timed_backends. Staff
+# always get the Server-Timing header; SERVER_TIMING_HEADER sends it to
+# everyone, which exposes backend timings, so it is off outside DEBUG.
+
+SESSION_ENGINE = "core.timed_backends"
+SERVER_TIMING_HEADER = os.getenv("SERVER_TIMING_HEADER", str(DEBUG)) == "True"
+REQUEST_TIMING_LOG_LEVEL = os.getenv("REQUEST_TIMING_LOG_LEVEL", "INFO")
+
+# Staff-only sampling profiles (core.middleware.ProfilingMiddleware).
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", BASE_DIR / "profiles"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core": {"handlers": ["console"], "level": "INFO"},
+        "core.timing": {"handlers": ["console"], "level": REQUEST_TIMING_LOG_LEVEL, "propagate": False},
+    },
+}
+
+# Live availability (server-sent events, ASGI only): slot deltas fan out
+# through Redis pub/sub when REDIS_URL is set, otherwise within the process.
+
+LIVE_AVAILABILITY_BROKER_URL = os.getenv("REDIS_URL")
+LIVE_AVAILABILITY_KEEPALIVE_SECONDS = int(os.getenv("LIVE_AVAILABILITY_KEEPALIVE_SECONDS", "20"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -145,11 +231,64 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# static/css/styles.css is built from assets/css/tailwind.css (npm run build:css).
+# Outside DEBUG, collectstatic writes content-hashed copies plus gzip and
+# brotli variants, and WhiteNoise serves hashed files with far-future immutable headers.
 
 STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage" if DEBUG else "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+
+WHITENOISE_MAX_AGE = 0 if DEBUG else 3600
+
+# Stripe
+
+STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY")
+STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET")
+STRIPE_CURRENCY = os.getenv("STRIPE_CURRENCY", "usd")
+STRIPE_APPLICATION_FEE_PERCENT = os.getenv("STRIPE_APPLICATION_FEE_PERCENT", "5")
+
+# Points Stripe API calls elsewhere, e.g. at the local stand-in started by
+# `python manage.py fake_stripe`.
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE")
+
+# Stripe calls (core.utils.stripe_gateway) time out and are retried under the
+# same idempotency key. STRIPE_BREAKER_FAILURES consecutive outage errors stop
+# all calls for STRIPE_BREAKER_RESET_SECONDS.
+
+STRIPE_TIMEOUT_SECONDS = float(os.getenv("STRIPE_TIMEOUT_SECONDS", "10"))
+STRIPE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("STRIPE_CONNECT_TIMEOUT_SECONDS", "3"))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv("STRIPE_MAX_NETWORK_RETRIES", "1"))
+STRIPE_BREAKER_FAILURES = int(os.getenv("STRIPE_BREAKER_FAILURES", "5"))
+STRIPE_BREAKER_RESET_SECONDS = float(os.getenv("STRIPE_BREAKER_RESET_SECONDS", "30"))
+
+# Slot holds keep a slot reserved while the player is in Stripe Checkout.
+# Checkout closes SLOT_HOLD_GRACE_MINUTES before the hold expires, and Stripe
+# requires a checkout window of at least 30 minutes.
+
+SLOT_HOLD_MINUTES = int(os.getenv("SLOT_HOLD_MINUTES", "35"))
+SLOT_HOLD_GRACE_MINUTES = int(os.getenv("SLOT_HOLD_GRACE_MINUTES", "5"))
+
+# Public availability API: shared caches may reuse a response for
+# AVAILABILITY_CACHE_SECONDS and then revalidate it against its ETag.
+
+AVAILABILITY_CACHE_SECONDS = int(os.getenv("AVAILABILITY_CACHE_SECONDS", "5"))
+AVAILABILITY_MAX_DAYS = int(os.getenv("AVAILABILITY_MAX_DAYS", "31"))
+SLOT_SEARCH_MAX_DAYS = int(os.getenv("SLOT_SEARCH_MAX_DAYS", "90"))
+SLOT_SEARCH_MAX_RESULTS = int(os.getenv("SLOT_SEARCH_MAX_RESULTS", "50"))
+VENUE_SEARCH_MAX_RESULTS = int(os.getenv("VENUE_SEARCH_MAX_RESULTS", "50"))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -16,12 +16,21 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from core.views import dashboard_view, launch_setting, navigate_setting, save_setting_edit, add_setting_item, delete_setting_item
+from core.views import availability_api, next_slots_api, venue_search_api, book_slot, booking_page_view, dashboard_view, monitor_view, export_bookings, import_setting, launch_setting, navigate_setting, save_setting_edit, add_setting_item, delete_setting_item, import_holiday_exceptions, stripe_webhook
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('allauth.urls')),
     path("dashboard/", dashboard_view, name="dashboard"),
+    path("monitor/<int:booking_page_id>/", monitor_view, name="monitor"),
+    path("monitor/<int:booking_page_id>/export/<str:file_format>/", export_bookings, name="export_bookings"),
+    path("book/<str:public_url>/", booking_page_view, name="booking_page"),
+    path("api/venues/", venue_search_api, name="venue_search_api"),
+    path("api/availability/<str:public_url>/", availability_api, name="availability_api"),
+    path("api/availability/<str:public_url>/next/", next_slots_api, name="next_slots_api"),
+    path("book/<str:public_url>/reserve/", book_slot, name="book_slot"),
+    path("stripe/webhook/", stripe_webhook, name="stripe_webhook"),
+    path("booking_page/import/", import_setting, name="import_setting"),
     path("booking_page/create/", launch_setting, {'mode': 'create'}, name="launch_setting_create"),
     path("booking_page/<int:booking_page_id>/edit/", launch_setting, {'mode': 'edit'}, name="launch_setting_edit"),
     path("booking_page/navigate/<str:direction>/", navigate_setting, {'mode': 'create'}, name="navigate_setting_create"),
@@ -29,6 +38,7 @@ urlpatterns = [
     path('booking_page/<int:booking_page_id>/edit/save/<str:section>/', save_setting_edit, name='save_setting_edit'),
     path("booking_page/add/<str:section>/", add_setting_item, {'mode': 'create'}, name="add_setting_item_create"),
     path("booking_page/<int:booking_page_id>/add/<str:section>/", add_setting_item, {'mode': 'edit'}, name="add_setting_item_edit"),
+    path("booking_page/<int:booking_page_id>/import/holiday_exceptions/", import_holiday_exceptions, name="import_holiday_exceptions"),
     path("booking_page/delete/<str:section>/<int:index>/", delete_setting_item, {'mode': 'create'}, name="delete_setting_item_create"),
     path("booking_page/<int:booking_page_id>/delete/<str:section>/<int:object_id>/", delete_setting_item, {'mode': 'edit'}, name="delete_setting_item_edit"),
 ]
\ No newline at end of file
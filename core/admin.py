@@ -1,9 +1,9 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import (Organiser, BookingPage, Court, SlotDefinition, EquipmentOption,OpeningHourRule, HolidayException, SpecialException,Booking, BookingEquipmentOption)
+from .models import (Organiser, BookingPage, Court, SlotDefinition, EquipmentOption,OpeningHourRule, HolidayException, SpecialException,Booking, BookingEquipmentOption, CourtOccupancy, CourtDailyRollup, StripeEvent, BookingPageLocality, WizardDraft, WizardDraftItem)
 
-models = [Organiser, BookingPage, Court, SlotDefinition, EquipmentOption,OpeningHourRule, HolidayException, SpecialException,Booking, BookingEquipmentOption]
+models = [Organiser, BookingPage, Court, SlotDefinition, EquipmentOption,OpeningHourRule, HolidayException, SpecialException,Booking, BookingEquipmentOption, CourtOccupancy, CourtDailyRollup, StripeEvent, BookingPageLocality, WizardDraft, WizardDraftItem]
 
 for model in models:
     admin.site.register(model)
\ No newline at end of file
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.utils.query_log import install_query_recorder
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(install_query_recorder, dispatch_uid="core_query_recorder")
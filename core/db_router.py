@@ -0,0 +1,128 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from functools import wraps
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Views decorated with @replica_reads read core models from the "replica"
+# alias. Everything else, every write, and any read after a write or inside
+# a transaction in the same request goes to the primary. A client that wrote stays pinned to the
+# primary for REPLICA_LAG_TOLERANCE_SECONDS through a cookie, and the replica
+# is skipped altogether while its measured lag exceeds that tolerance.
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "db_primary_pin"
+LAG_CHECK_SECONDS = 5
+
+request_state = ContextVar("replica_request_state", default=None)
+lag_cache = {"checked_at": 0.0, "healthy": True}
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+def replica_is_healthy():
+    # Lag is measured at most every LAG_CHECK_SECONDS per process; PostgreSQL
+    # standbys report it, other backends are assumed to be in sync.
+    now = time.monotonic()
+    if now - lag_cache["checked_at"] < LAG_CHECK_SECONDS:
+        return lag_cache["healthy"]
+
+    lag_cache["checked_at"] = now
+    connection = connections[REPLICA_ALIAS]
+    try:
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT CASE WHEN pg_is_in_recovery() THEN "
+                    "COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) ELSE 0 END"
+                )
+                lag = float(cursor.fetchone()[0])
+        else:
+            lag = 0.0
+        lag_cache["healthy"] = lag <= settings.REPLICA_LAG_TOLERANCE_SECONDS
+        if not lag_cache["healthy"]:
+            logger.warning("Replica lag %.1fs exceeds tolerance, reading from primary", lag)
+    except Exception:
+        logger.warning("Replica unavailable, reading from primary", exc_info=True)
+        lag_cache["healthy"] = False
+    return lag_cache["healthy"]
+
+def replica_reads(view):
+    def enable():
+        state = request_state.get()
+        if state is not None:
+            state["replica"] = True
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            enable()
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        enable()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = request_state.get()
+        if not state or not state.get("replica") or state["pinned"] or state["wrote"]:
+            return None
+        # Auth and session data must always be fresh.
+        if model._meta.app_label != "core" or model._meta.label == settings.AUTH_USER_MODEL:
+            return None
+        # Reads inside a transaction on the primary must see its writes.
+        if connections["default"].in_atomic_block:
+            return None
+        if not replica_configured() or not replica_is_healthy():
+            return None
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+class ReplicaPinningMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def start(self, request):
+        return request_state.set({"pinned": PIN_COOKIE in request.COOKIES, "wrote": False, "replica": False})
+
+    def finish(self, response):
+        if request_state.get()["wrote"] and replica_configured():
+            response.set_cookie(PIN_COOKIE, "1", max_age=settings.REPLICA_LAG_TOLERANCE_SECONDS, httponly=True, samesite="Lax")
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            return self.finish(self.get_response(request))
+        finally:
+            request_state.reset(token)
+
+    async def __acall__(self, request):
+        token = self.start(request)
+        try:
+            return self.finish(await self.get_response(request))
+        finally:
+            request_state.reset(token)
@@ -1,6 +1,8 @@
 from allauth.account.forms import LoginForm, ResetPasswordForm, ResetPasswordKeyForm, SignupForm
+from datetime import date
 from django import forms
 from django.forms import formset_factory
+from django.utils import timezone
 
 class CustomLoginForm(LoginForm):
     def __init__(self, *args, **kwargs):
@@ -213,6 +215,12 @@ class HolidayExceptionForm(forms.Form):
         return cleaned_data
 
 class SpecialExceptionForm(forms.Form):
+    RECURRENCE_CHOICES = [
+        ("none", "Does not repeat"),
+        ("weekly", "Weekly"),
+        ("biweekly", "Every 2 weeks"),
+    ]
+
     court = forms.ChoiceField(
         label="Court",
         required=True,
@@ -266,6 +274,132 @@ class SpecialExceptionForm(forms.Form):
         )
     )
 
+    recurrence = forms.ChoiceField(
+        label="Repeats",
+        choices=RECURRENCE_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={
+            "id": "recurrence",
+            "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+        })
+    )
+    until = forms.DateField(
+        label="Until",
+        required=False,
+        widget=forms.DateInput(attrs={
+            "id": "until",
+            "type": "date",
+            "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+        })
+    )
+    excluded_dates = forms.CharField(
+        label="Skip Dates",
+        required=False,
+        widget=forms.TextInput(
+            attrs={
+                "id": "excluded_dates",
+                "placeholder": "YYYY-MM-DD, YYYY-MM-DD",
+                "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+            }
+        )
+    )
+
+    def __init__(self, *args, **kwargs):
+        courts = kwargs.pop("courts", None)
+        super().__init__(*args, **kwargs)
+        if courts:
+            self.fields["court"].choices = [(court.id, court.name) for court in courts]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get("start_time")
+        end = cleaned_data.get("end_time")
+
+        if start and end and start >= end:
+            raise forms.ValidationError("Start time must be earlier than end time.")
+
+        cleaned_data["recurrence"] = cleaned_data.get("recurrence") or "none"
+        if cleaned_data["recurrence"] == "none":
+            cleaned_data["until"] = None
+            cleaned_data["excluded_dates"] = []
+            return cleaned_data
+
+        day = cleaned_data.get("date")
+        until = cleaned_data.get("until")
+        if day and until and until < day:
+            raise forms.ValidationError("Until must not be earlier than the date.")
+
+        excluded_dates = []
+        for value in (cleaned_data.get("excluded_dates") or "").replace(";", ",").split(","):
+            if value.strip():
+                try:
+                    excluded_dates.append(date.fromisoformat(value.strip()).isoformat())
+                except ValueError:
+                    raise forms.ValidationError(f"Invalid skip date {value.strip()}.")
+        cleaned_data["excluded_dates"] = sorted(set(excluded_dates))
+
+        return cleaned_data
+
+class BookingForm(forms.Form):
+    court = forms.ChoiceField(
+        label="Court",
+        required=True,
+        widget=forms.Select(attrs={
+            "id": "court",
+            "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+        })
+    )
+    date = forms.DateField(
+        label="Date",
+        required=True,
+        widget=forms.DateInput(attrs={
+            "id": "date",
+            "type": "date",
+            "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+        })
+    )
+    start_time = forms.TimeField(
+        label="Start Time",
+        required=True,
+        widget=forms.TimeInput(
+            format="%H:%M",
+            attrs={
+                "id": "start_time",
+                "type": "time",
+                "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+            }
+        )
+    )
+    end_time = forms.TimeField(
+        label="End Time",
+        required=True,
+        widget=forms.TimeInput(
+            format="%H:%M",
+            attrs={
+                "id": "end_time",
+                "type": "time",
+                "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+            }
+        )
+    )
+    player_email = forms.EmailField(
+        label="Email",
+        required=True,
+        widget=forms.EmailInput(attrs={
+            "id": "player_email",
+            "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+        })
+    )
+    player_phone = forms.CharField(
+        label="Phone",
+        max_length=30,
+        required=True,
+        widget=forms.TextInput(attrs={
+            "id": "player_phone",
+            "class": "mt-1 w-full border-gray-300 focus:ring-yellow-500 focus:border-yellow-500 rounded-md shadow-sm"
+        })
+    )
+
     def __init__(self, *args, **kwargs):
         courts = kwargs.pop("courts", None)
         super().__init__(*args, **kwargs)
@@ -280,4 +414,9 @@ class SpecialExceptionForm(forms.Form):
         if start and end and start >= end:
             raise forms.ValidationError("Start time must be earlier than end time.")
 
+        day = cleaned_data.get("date")
+        now = timezone.localtime()
+        if day and (day < now.date() or (day == now.date() and start and start < now.time())):
+            raise forms.ValidationError("This time has already passed.")
+
         return cleaned_data
\ No newline at end of file
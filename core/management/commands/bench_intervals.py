@@ -0,0 +1,63 @@
+from core.utils.intervals import IntervalIndex
+from django.core.management.base import BaseCommand
+import random
+import timeit
+
+def naive_free_starts(intervals, open_start, open_end, slot_size):
+    start = -(-open_start // slot_size) * slot_size
+    free = []
+    while start + slot_size <= open_end:
+        if not any(row_start < start + slot_size and row_end > start for row_start, row_end, _ in intervals):
+            free.append(start)
+        start += slot_size
+    return free
+
+def naive_overlapping(intervals, start, end):
+    return [item for row_start, row_end, item in intervals if row_start < end and row_end > start]
+
+def random_intervals(count, slot_size, seed, span=24 * 60):
+    # A small span clusters every interval early in the day, leaving the rest
+    # free: the worst case for the naive scan, which checks every row per slot.
+    rng = random.Random(seed)
+    intervals = []
+    for index in range(count):
+        start = rng.randrange(0, span - slot_size)
+        intervals.append((start, min(24 * 60, start + rng.choice((slot_size, 2 * slot_size, 45, 90))), index))
+    return intervals
+
+class Command(BaseCommand):
+    help = "Compare the court-day interval index with naive row scans for day grids and overlap queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, action="append", help="Intervals per court-day (repeatable). Defaults to 10, 100 and 1000.")
+        parser.add_argument("--slot-size", type=int, default=30)
+        parser.add_argument("--queries", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def best_of(self, function, repeat):
+        return min(timeit.repeat(function, number=1, repeat=repeat))
+
+    def handle(self, *args, **options):
+        slot_size = options["slot_size"]
+        rng = random.Random(options["seed"])
+        queries = [(start, start + slot_size) for start in (rng.randrange(0, 24 * 60 - slot_size) for _ in range(options["queries"]))]
+
+        self.stdout.write(f"{'rows':>6} {'layout':>10} {'grid naive':>12} {'grid index':>12} {'query naive':>12} {'query index':>12}")
+        for count in options["rows"] or [10, 100, 1000]:
+            for layout, span in (("uniform", 24 * 60), ("clustered", 120)):
+                intervals = random_intervals(count, slot_size, options["seed"], span)
+
+                index = IntervalIndex(intervals)
+                assert index.free_starts(0, 24 * 60, slot_size) == naive_free_starts(intervals, 0, 24 * 60, slot_size)
+                assert all(sorted(index.overlapping(*query)) == naive_overlapping(intervals, *query) for query in queries[:50])
+
+                grid_naive = self.best_of(lambda: naive_free_starts(intervals, 0, 24 * 60, slot_size), options["repeat"])
+                grid_index = self.best_of(lambda: IntervalIndex(intervals).free_starts(0, 24 * 60, slot_size), options["repeat"])
+                query_naive = self.best_of(lambda: [naive_overlapping(intervals, *query) for query in queries], options["repeat"])
+                query_index = self.best_of(lambda: [index.overlapping(*query) for query in queries], options["repeat"])
+
+                self.stdout.write(
+                    f"{count:>6} {layout:>10} {grid_naive * 1000:>10.3f}ms {grid_index * 1000:>10.3f}ms "
+                    f"{query_naive * 1000:>10.3f}ms {query_index * 1000:>10.3f}ms"
+                )
@@ -0,0 +1,93 @@
+from core.utils.fake_stripe import fake_stripe_backend
+from core.utils.load_test import SCENARIOS, load_context, remove_checkout_bookings, run_scenario, seed_dataset
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from pathlib import Path
+import json
+import subprocess
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class Command(BaseCommand):
+    help = (
+        "Seed a load-test dataset and drive the dashboard, editor, public availability and checkout "
+        "endpoints at a given concurrency against a local fake Stripe. Writes the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="Repeatable. Defaults to all.")
+        parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--seed", action="store_true", help="(Re)create the dataset before running.")
+        parser.add_argument("--pages", type=int, default=10)
+        parser.add_argument("--courts", type=int, default=6)
+        parser.add_argument("--days", type=int, default=60, help="Days of seeded bookings.")
+        parser.add_argument("--occupancy", type=float, default=0.4)
+        parser.add_argument("--stripe-latency", type=int, default=150, help="Fake Stripe delay in milliseconds.")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--output", help="JSON results path. Defaults to loadtest-results/<commit>.json.")
+        parser.add_argument("--compare", help="Earlier JSON results to compare against.")
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            counts = seed_dataset(options["pages"], options["courts"], options["days"], options["occupancy"])
+            self.stdout.write(f"Seeded {counts['pages']} pages, {counts['courts']} courts, {counts['bookings']} bookings.")
+
+        context = load_context(options["days"])
+        if not context or not context["pages"]:
+            raise CommandError("No load-test dataset. Run with --seed first.")
+
+        results = {}
+        try:
+            with fake_stripe_backend(latency=options["stripe_latency"] / 1000):
+                for name in options["scenario"] or list(SCENARIOS):
+                    results[name] = run_scenario(name, context, options["requests"], options["concurrency"], options["warmup"], options["host"])
+        finally:
+            remove_checkout_bookings()
+
+        commit = get_commit()
+        report = {
+            "commit": commit,
+            "created_at": timezone.now().isoformat(),
+            "options": {key: options[key] for key in ("requests", "concurrency", "warmup", "days", "stripe_latency")},
+            "dataset": {"pages": len(context["pages"]), "courts": sum(len(page["courts"]) for page in context["pages"])},
+            "scenarios": results,
+        }
+
+        self.stdout.write(f"{'scenario':<13} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'errors':>7}")
+        for name, result in results.items():
+            latency = result["latency_ms"]
+            self.stdout.write(
+                f"{name:<13} {result['throughput']:>8.1f} {latency['p50']:>7.1f}ms {latency['p95']:>7.1f}ms "
+                f"{latency['p99']:>7.1f}ms {result['queries']['mean']:>8.1f} {result['errors']:>7}"
+            )
+
+        output = Path(options["output"] or f"loadtest-results/{commit or timezone.now().strftime('%Y%m%d%H%M%S')}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        self.stdout.write(f"Results written to {output}")
+
+        if options["compare"]:
+            self.compare(json.loads(Path(options["compare"]).read_text()), report)
+
+    def compare(self, baseline, report):
+        self.stdout.write(f"Compared with {baseline.get('commit') or baseline['created_at']}:")
+        for name, result in report["scenarios"].items():
+            before = baseline["scenarios"].get(name)
+            if not before:
+                continue
+            changes = []
+            for label, old, new in (
+                ("p95", before["latency_ms"]["p95"], result["latency_ms"]["p95"]),
+                ("req/s", before["throughput"], result["throughput"]),
+                ("queries", before["queries"]["mean"], result["queries"]["mean"]),
+            ):
+                change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+                changes.append(f"{label} {old} -> {new} ({change})")
+            self.stdout.write(f"  {name:<13} " + ", ".join(changes))
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from core.models import BookingPage
+from core.utils.load_test import percentile
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+import asyncio
+import threading
+import time
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent throughput of the public views served the WSGI way (a pool of worker threads, "
+        "one request each) and the ASGI way (one event loop) in this process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("public_url")
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50, help="Clients sending requests back to back.")
+        parser.add_argument("--threads", type=int, default=4, help="Worker threads for the WSGI run, as in a gthread worker.")
+        parser.add_argument("--days", type=int, default=7, help="Days per availability request.")
+        parser.add_argument("--host", default="localhost")
+        parser.add_argument("--mode", choices=["wsgi", "asgi", "both"], default="both")
+
+    def get_paths(self, public_url, days):
+        start = date.today()
+        end = start + timedelta(days=days - 1)
+        return [
+            reverse("booking_page", args=[public_url]),
+            f"{reverse('availability_api', args=[public_url])}?start={start:%Y-%m-%d}&end={end:%Y-%m-%d}",
+        ]
+
+    async def drive(self, send, paths, total, concurrency):
+        latencies, errors = [], 0
+        remaining = iter(range(total))
+
+        async def client():
+            nonlocal errors
+            for index in remaining:
+                started = time.perf_counter()
+                response = await send(paths[index % len(paths)])
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - started
+
+    async def run_wsgi(self, paths, options):
+        local = threading.local()
+
+        def get(path):
+            if not hasattr(local, "client"):
+                local.client = Client(headers={"host": options["host"]}, raise_request_exception=False)
+            return local.client.get(path)
+
+        with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+            loop = asyncio.get_running_loop()
+            return await self.drive(lambda path: loop.run_in_executor(pool, get, path), paths, options["requests"], options["concurrency"])
+
+    async def run_asgi(self, paths, options):
+        client = AsyncClient(headers={"host": options["host"]}, raise_request_exception=False)
+        return await self.drive(client.get, paths, options["requests"], options["concurrency"])
+
+    def handle(self, *args, **options):
+        if not BookingPage.objects.filter(public_url=options["public_url"], is_active=True).exists():
+            raise CommandError("Active booking page not found")
+
+        paths = self.get_paths(options["public_url"], options["days"])
+        modes = ["wsgi", "asgi"] if options["mode"] == "both" else [options["mode"]]
+
+        self.stdout.write(f"{'mode':>6} {'req/s':>9} {'p50':>10} {'p95':>10} {'p99':>10} {'errors':>7}")
+        for mode in modes:
+            run = self.run_wsgi if mode == "wsgi" else self.run_asgi
+            latencies, errors, elapsed = asyncio.run(run(paths, options))
+            self.stdout.write(
+                f"{mode:>6} {len(latencies) / elapsed:>9.1f} {percentile(latencies, 50) * 1000:>8.1f}ms "
+                f"{percentile(latencies, 95) * 1000:>8.1f}ms {percentile(latencies, 99) * 1000:>8.1f}ms {errors:>7}"
+            )
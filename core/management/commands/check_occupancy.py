@@ -0,0 +1,32 @@
+from core.utils.occupancy import check_occupancy, refresh_occupancy
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+def format_occupancy(values):
+    busy_mask, held_mask, held_until = values
+    return f"busy:{busy_mask:b}/held:{held_mask:b}/until:{held_until.isoformat() if held_until else '-'}"
+
+class Command(BaseCommand):
+    help = "Compare the occupancy ledger with bookings and exceptions and report drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, action="append", dest="booking_page_ids", help="Booking page id (repeatable). Defaults to all pages.")
+        parser.add_argument("--since", type=parse_date, help="Only check dates on or after YYYY-MM-DD.")
+        parser.add_argument("--fix", action="store_true", help="Refresh every drifted court-day.")
+
+    def handle(self, *args, **options):
+        mismatches = check_occupancy(options["booking_page_ids"], since=options["since"])
+
+        for court_id, day, stored, expected in mismatches:
+            stored = "missing" if stored is None else format_occupancy(stored)
+            self.stdout.write(f"court={court_id} date={day} stored={stored} expected={format_occupancy(expected)}")
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Occupancy ledger is consistent."))
+            return
+
+        if options["fix"]:
+            refresh_occupancy([(court_id, day) for court_id, day, _, _ in mismatches])
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(mismatches)} court-day rows."))
+        else:
+            raise CommandError(f"{len(mismatches)} court-day rows are inconsistent.")
@@ -0,0 +1,21 @@
+from core.utils.query_budget import check_query_budgets, get_budget_problems
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = "Request every URL in config/urls.py against the load-test dataset and fail if one runs more queries than its declared budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        results, missing = check_query_budgets(options["host"])
+
+        self.stdout.write(f"{'url':<48} {'status':>6} {'queries':>8} {'budget':>7}")
+        for result in results:
+            name = f"{result['name']} [{result['label']}]" if result["label"] else result["name"]
+            self.stdout.write(f"{name:<48} {result['status']:>6} {result['queries']:>8} {result['budget']:>7}")
+
+        problems = get_budget_problems(results, missing)
+        if problems:
+            raise CommandError("Query budgets exceeded:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} requests within their query budgets."))
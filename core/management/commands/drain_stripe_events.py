@@ -0,0 +1,26 @@
+from core.utils.stripe_events import process_events
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import time
+
+class Command(BaseCommand):
+    help = "Apply stored Stripe webhook events to bookings in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--interval", type=int, default=0, help="Keep draining every N seconds instead of running once.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = 0
+            while True:
+                count = process_events(batch_size=options["batch_size"])
+                processed += count
+                if count < options["batch_size"]:
+                    break
+            if processed or not options["interval"]:
+                self.stdout.write(f"Processed {processed} Stripe events.")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
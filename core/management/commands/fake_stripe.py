@@ -0,0 +1,21 @@
+from core.utils.fake_stripe import FakeStripeServer
+from django.core.management.base import BaseCommand
+
+class Command(BaseCommand):
+    help = "Run a local stand-in for the Stripe API. Point STRIPE_API_BASE at it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=12111)
+        parser.add_argument("--latency", type=int, default=0, help="Delay per request in milliseconds.")
+        parser.add_argument("--fail-status", type=int, help="Answer every request with this HTTP status, e.g. 503.")
+
+    def handle(self, *args, **options):
+        server = FakeStripeServer(options["host"], options["port"], options["latency"] / 1000, options["fail_status"])
+        self.stdout.write(f"Fake Stripe API listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
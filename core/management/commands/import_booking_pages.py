@@ -0,0 +1,32 @@
+from core.models import Organiser
+from core.utils.booking_page_import import import_booking_pages, parse_booking_pages
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+class Command(BaseCommand):
+    help = "Create booking pages in bulk from a JSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--organiser", required=True, help="Email of the organiser who will own the pages.")
+        parser.add_argument("--format", choices=["json", "csv"], help="Defaults to the file extension.")
+        parser.add_argument("--active", action="store_true", help="Publish the pages immediately.")
+
+    def handle(self, *args, **options):
+        organiser = Organiser.objects.filter(email=options["organiser"]).first()
+        if not organiser:
+            raise CommandError("Organiser not found")
+
+        file_format = options["format"] or ("csv" if options["path"].lower().endswith(".csv") else "json")
+        with open(options["path"], "rb") as f:
+            try:
+                pages = parse_booking_pages(f.read(), file_format)
+            except ValueError as e:
+                raise CommandError(f"Could not read {options['path']}: {e}")
+
+        started = time.monotonic()
+        created, errors = import_booking_pages(organiser, pages, is_active=options["active"])
+
+        for index, name, page_errors in errors:
+            self.stderr.write(f"#{index} {name}: {'; '.join(page_errors)}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(created)} pages in {time.monotonic() - started:.2f}s, skipped {len(errors)}."))
@@ -0,0 +1,29 @@
+from core.models import BookingPage
+from core.utils.holiday_import import import_holidays
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = "Import holiday exceptions from an iCalendar (.ics) file, skipping ones that already exist."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--page", type=int, action="append", dest="booking_page_ids", help="Booking page id (repeatable).")
+        parser.add_argument("--organiser", help="Import into every booking page of this organiser (email).")
+
+    def handle(self, *args, **options):
+        if not options["booking_page_ids"] and not options["organiser"]:
+            raise CommandError("Pass --page or --organiser")
+
+        booking_pages = BookingPage.objects.all()
+        if options["booking_page_ids"]:
+            booking_pages = booking_pages.filter(id__in=options["booking_page_ids"])
+        if options["organiser"]:
+            booking_pages = booking_pages.filter(organiser__email=options["organiser"])
+        booking_pages = list(booking_pages)
+        if not booking_pages:
+            raise CommandError("No booking pages found")
+
+        with open(options["path"], "rb") as f:
+            created = import_holidays(booking_pages, f)
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} holiday exceptions into {len(booking_pages)} pages."))
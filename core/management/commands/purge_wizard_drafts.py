@@ -0,0 +1,9 @@
+from core.utils.wizard_drafts import purge_expired_drafts
+from django.core.management.base import BaseCommand
+
+class Command(BaseCommand):
+    help = "Delete create wizard drafts that have not been touched within WIZARD_DRAFT_TTL_HOURS."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_drafts()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired wizard drafts."))
@@ -0,0 +1,29 @@
+from core.models import BookingPage
+from core.utils.venue_search import refresh_localities
+from django.core.management.base import BaseCommand
+
+class Command(BaseCommand):
+    help = "Rebuild the normalized location terms used by the venue search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, action="append", dest="booking_page_ids", help="Booking page id (repeatable). Defaults to all pages.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        booking_pages = BookingPage.objects.only("id", "location").order_by("id")
+        if options["booking_page_ids"]:
+            booking_pages = booking_pages.filter(id__in=options["booking_page_ids"])
+
+        rebuilt = 0
+        batch = []
+        for booking_page in booking_pages.iterator(chunk_size=options["batch_size"]):
+            batch.append(booking_page)
+            if len(batch) == options["batch_size"]:
+                refresh_localities(batch)
+                rebuilt += len(batch)
+                batch = []
+        if batch:
+            refresh_localities(batch)
+            rebuilt += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt locations for {rebuilt} booking pages."))
@@ -0,0 +1,14 @@
+from core.utils.rollups import rebuild_rollups
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+class Command(BaseCommand):
+    help = "Rebuild the per court-day booking rollups shown on the monitor."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page", type=int, action="append", dest="booking_page_ids", help="Booking page id (repeatable). Defaults to all pages.")
+        parser.add_argument("--since", type=parse_date, help="Only rebuild dates on or after YYYY-MM-DD.")
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_rollups(options["booking_page_ids"], since=options["since"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} court-day rollups."))
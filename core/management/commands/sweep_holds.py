@@ -0,0 +1,21 @@
+from core.utils.bookings import release_expired_holds
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+import time
+
+class Command(BaseCommand):
+    help = "Release unpaid slot holds whose checkout window has expired."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--interval", type=int, default=0, help="Keep sweeping every N seconds instead of running once.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            released = release_expired_holds(batch_size=options["batch_size"])
+            if released or not options["interval"]:
+                self.stdout.write(f"Released {released} expired holds.")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,180 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from core.utils.query_log import collect_queries
+from core.utils.request_timing import StackSampler, collect_timings, format_server_timing
+from django.conf import settings
+from django.utils import timezone
+from time import perf_counter
+from whitenoise.middleware import WhiteNoiseMiddleware
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("core.timing")
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    # WhiteNoise is sync-only; under ASGI Django would then run every request
+    # below it in a worker thread. Non-static requests are passed straight
+    # through on the event loop instead.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        static_file = self.find_file(request.path_info) if self.autorefresh else self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+class QueryLogMiddleware:
+    # Counts and times the queries of each request and logs requests over
+    # QUERY_LOG_COUNT_THRESHOLD queries or repeating one query shape at least
+    # QUERY_LOG_DUPLICATE_THRESHOLD times. Streamed bodies (exports) are
+    # consumed after this returns and are not counted.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def report(self, request, log):
+        # Fingerprinting is only worth it when enough queries ran to repeat one.
+        threshold = settings.QUERY_LOG_DUPLICATE_THRESHOLD
+        duplicates = log.duplicates(threshold) if log.count >= threshold else []
+        if log.count <= settings.QUERY_LOG_COUNT_THRESHOLD and not duplicates:
+            return
+
+        view = request.resolver_match.view_name if request.resolver_match else None
+        logger.warning(
+            "%s %s (%s): %d queries in %.1fms%s",
+            request.method,
+            request.path,
+            view,
+            log.count,
+            log.duration * 1000,
+            "".join(f"\n  {count}x {sql[:300]}" for sql, count in duplicates[:5]),
+            extra={"view": view, "query_count": log.count, "query_ms": round(log.duration * 1000, 1), "duplicates": duplicates[:5]},
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with collect_queries() as log:
+            response = self.get_response(request)
+        self.report(request, log)
+        return response
+
+    async def __acall__(self, request):
+        with collect_queries() as log:
+            response = await self.get_response(request)
+        self.report(request, log)
+        return response
+
+class RequestTimingMiddleware:
+    # Splits each request's time into db (every query), session (loading the
+    # session), render (templates, including the cached editor lists), stripe
+    # (API calls) and total, logged as one JSON line on "core.timing" and sent
+    # as a Server-Timing header (shown in the browser's network panel) to staff,
+    # or to everyone with SERVER_TIMING_HEADER. Staff are only recognised when
+    # the request already loaded its user, so the check never adds a query.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def finish(self, request, response, log, timings, started):
+        total = perf_counter() - started
+        metrics = [
+            ("db", log.duration, f"{log.count} queries"),
+            *((phase, seconds, None) for phase, seconds in timings.phases.items()),
+            ("total", total, None),
+        ]
+        user = getattr(request, "_cached_user", None) or getattr(request, "_acached_user", None)
+        if settings.SERVER_TIMING_HEADER or (user is not None and user.is_staff):
+            server_timing = format_server_timing(metrics)
+            response["Server-Timing"] = f"{response['Server-Timing']}, {server_timing}" if response.has_header("Server-Timing") else server_timing
+
+        timing_logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "view": request.resolver_match.view_name if request.resolver_match else None,
+            "status": response.status_code,
+            "queries": log.count,
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds, _ in metrics},
+        }))
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = perf_counter()
+        with collect_queries() as log, collect_timings() as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, log, timings, started)
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        with collect_queries() as log, collect_timings() as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, log, timings, started)
+
+class ProfilingMiddleware:
+    # Staff can profile a single request by sending the PROFILE_HEADER header
+    # (X-Profile: 1). Its stacks are sampled every PROFILE_INTERVAL_MS and
+    # written in collapsed form to PROFILE_DIR, named in the X-Profile-File
+    # response header. Every thread of the worker is sampled, since async views
+    # run on another thread (async_to_sync's event loop under WSGI), so other
+    # requests in flight show up under their own threads.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def save(self, request, response, sampler):
+        view = request.resolver_match.view_name if request.resolver_match else "unresolved"
+        path = settings.PROFILE_DIR / f"{timezone.now():%Y%m%d-%H%M%S-%f}-{view.replace(':', '-')}.collapsed"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(sampler.collapsed())
+        response["X-Profile-File"] = path.name
+        logger.info("Profiled %s %s: %d samples written to %s", request.method, request.path, sampler.samples, path)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if settings.PROFILE_HEADER not in request.headers or not request.user.is_staff:
+            return self.get_response(request)
+
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000).start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        return self.save(request, response, sampler)
+
+    async def __acall__(self, request):
+        if settings.PROFILE_HEADER not in request.headers or not (await request.auser()).is_staff:
+            return await self.get_response(request)
+
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000).start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        return self.save(request, response, sampler)
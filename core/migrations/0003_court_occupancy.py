@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_slotdefinition_booking_page'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourtOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slot_size', models.PositiveIntegerField()),
+                ('busy_mask', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to='core.court')),
+            ],
+            options={
+                'ordering': ['court', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('court', 'date'), name='unique_court_occupancy_date')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_court_occupancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='hold_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='courtoccupancy',
+            name='held_mask',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='courtoccupancy',
+            name='held_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('hold_expires_at__isnull', False), ('payment_status', 'unpaid')), fields=['hold_expires_at'], name='booking_unpaid_hold_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_stripe_event_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourtDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booking_count', models.PositiveIntegerField(default=0)),
+                ('paid_count', models.PositiveIntegerField(default=0)),
+                ('unpaid_count', models.PositiveIntegerField(default=0)),
+                ('booked_minutes', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('court', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='core.court')),
+            ],
+            options={
+                'ordering': ['court', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('court', 'date'), name='unique_court_daily_rollup_date')],
+            },
+        ),
+    ]
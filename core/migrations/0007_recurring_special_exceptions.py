@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_court_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='specialexception',
+            name='excluded_dates',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='specialexception',
+            name='recurrence',
+            field=models.CharField(choices=[('none', 'Does not repeat'), ('weekly', 'Weekly'), ('biweekly', 'Every 2 weeks')], default='none', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='specialexception',
+            name='until',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='specialexception',
+            index=models.Index(condition=models.Q(('recurrence', 'none'), _negated=True), fields=['court', 'date'], name='special_exc_recurring_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_recurring_special_exceptions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingpage',
+            name='version',
+            field=models.PositiveBigIntegerField(default=1),
+        ),
+    ]
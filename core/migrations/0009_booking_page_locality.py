@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_booking_page_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingPageLocality',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=100)),
+                ('booking_page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='localities', to='core.bookingpage')),
+            ],
+            options={
+                'ordering': ['booking_page', 'term'],
+                'indexes': [models.Index(fields=['term', 'booking_page'], name='booking_page_locality_term_idx')],
+                'constraints': [models.UniqueConstraint(fields=('booking_page', 'term'), name='unique_booking_page_locality')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:04
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_booking_page_locality'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WizardDraft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organiser', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='wizard_draft', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['organiser'],
+            },
+        ),
+    ]
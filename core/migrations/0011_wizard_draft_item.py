@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:50
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+ITEM_SECTIONS = ["courts", "equipment_options", "holiday_exceptions", "special_exceptions"]
+
+
+def move_items_to_rows(apps, schema_editor):
+    # Drafts in progress keep their list sections, now one row per item.
+    WizardDraft = apps.get_model("core", "WizardDraft")
+    WizardDraftItem = apps.get_model("core", "WizardDraftItem")
+    for draft in WizardDraft.objects.all():
+        items = [
+            WizardDraftItem(draft=draft, section=section, data=data)
+            for section in ITEM_SECTIONS
+            for data in draft.data.pop(section, None) or []
+        ]
+        WizardDraftItem.objects.bulk_create(items)
+        draft.save(update_fields=["data"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_wizard_draft'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WizardDraftItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=32)),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.wizarddraft')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['draft', 'section'], name='core_wizard_draft_i_d10c3f_idx')],
+            },
+        ),
+        migrations.RunPython(move_items_to_rows, migrations.RunPython.noop),
+    ]
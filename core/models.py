@@ -1,5 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
-from django.db import models
+from datetime import timedelta
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 
 class OrganiserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -22,6 +24,64 @@ class OrganiserManager(BaseUserManager):
         
         return self.create_user(email, password, **extra_fields)
 
+class OccupancyTrackedModel(models.Model):
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_occupancy_days = instance.get_occupancy_days()
+        return instance
+
+    def get_occupancy_days(self):
+        # (court_days, page_days) whose ledger rows this instance contributes
+        # to. Subclasses override it; the default affects no rows.
+        return [], []
+
+    def refresh_occupancy(self):
+        from core.utils.occupancy import refresh_occupancy
+
+        court_days, page_days = self.get_occupancy_days()
+        loaded_court_days, loaded_page_days = getattr(self, "_loaded_occupancy_days", ([], []))
+        refresh_occupancy(court_days + loaded_court_days, page_days + loaded_page_days)
+        self._loaded_occupancy_days = (court_days, page_days)
+        return court_days + loaded_court_days, page_days + loaded_page_days
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.refresh_occupancy()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            self.refresh_occupancy()
+        return result
+
+def bump_page_version(**filters):
+    BookingPage.objects.filter(**filters).update(version=models.F("version") + 1)
+
+class PageVersionedModel(models.Model):
+    # Any write to page content bumps BookingPage.version, which public
+    # caches (availability ETags, fragment caches) key on.
+    class Meta:
+        abstract = True
+
+    def get_page_filter(self):
+        return {"id": self.booking_page_id}
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            bump_page_version(**self.get_page_filter())
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            bump_page_version(**self.get_page_filter())
+        return result
+
 class Organiser(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(unique=True)
     stripe_user_id = models.CharField(max_length=128, blank=True, null=True)
@@ -43,16 +103,48 @@ class BookingPage(models.Model):
     location = models.CharField(max_length=100)
     public_url = models.CharField(max_length=64, unique=True)
     is_active = models.BooleanField(default=True)
+    version = models.PositiveBigIntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
 
     @property
     def get_public_url(self):
         return f"/book/{self.public_url}/"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_location = instance.__dict__.get("location")
+        return instance
+
+    def save(self, *args, **kwargs):
+        from core.utils.venue_search import refresh_localities
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                bump_page_version(id=self.id)
+                self.refresh_from_db(fields=["version"])
+            if adding or getattr(self, "_loaded_location", None) != self.location:
+                refresh_localities([self])
+            self._loaded_location = self.location
+
     def __str__(self):
         return f"{self.name} {self.location}"
 
-class Court(models.Model):
+class BookingPageLocality(models.Model):
+    booking_page = models.ForeignKey("BookingPage", on_delete=models.CASCADE, related_name="localities")
+    term = models.CharField(max_length=100)
+
+    class Meta:
+        ordering = ['booking_page', 'term']
+        constraints = [models.UniqueConstraint(fields=['booking_page', 'term'], name='unique_booking_page_locality')]
+        indexes = [models.Index(fields=['term', 'booking_page'], name='booking_page_locality_term_idx')]
+
+    def __str__(self):
+        return f"{self.term} (Page: {self.booking_page.name})"
+
+class Court(PageVersionedModel):
     booking_page = models.ForeignKey("BookingPage", on_delete=models.CASCADE, related_name="courts")
     name = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -61,10 +153,21 @@ class Court(models.Model):
         ordering = ['booking_page', 'name']
         constraints = [models.UniqueConstraint(fields=['booking_page', 'name'], name='unique_booking_page_court_name')]
 
+    def save(self, *args, **kwargs):
+        from core.utils.occupancy import refresh_occupancy
+
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                # A new court starts out blocked on the page's holidays.
+                holidays = HolidayException.objects.filter(booking_page_id=self.booking_page_id).order_by().values_list("date", flat=True).distinct()
+                refresh_occupancy([(self.id, day) for day in holidays])
+
     def __str__(self):
         return f"{self.name} (Page: {self.booking_page.name})"
 
-class SlotDefinition(models.Model):
+class SlotDefinition(PageVersionedModel):
     SLOT_CHOICES = [
         (30, "30 minutes"),
         (60, "60 minutes"),
@@ -79,10 +182,25 @@ class SlotDefinition(models.Model):
         ordering = ['booking_page', 'slot_size']
         constraints = [models.UniqueConstraint(fields=['booking_page'], name='unique_booking_page')]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_slot_size = instance.__dict__.get("slot_size")
+        return instance
+
+    def save(self, *args, **kwargs):
+        from core.utils.occupancy import rebuild_occupancy
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if getattr(self, "_loaded_slot_size", None) not in (None, self.slot_size):
+                rebuild_occupancy([self.booking_page_id])
+            self._loaded_slot_size = self.slot_size
+
     def __str__(self):
         return f"{self.get_slot_size_display()} ${self.price:.2f} (Page: {self.booking_page.name})"
 
-class EquipmentOption(models.Model):
+class EquipmentOption(PageVersionedModel):
     booking_page = models.ForeignKey("BookingPage", on_delete=models.CASCADE, related_name="equipment_options")
     name = models.CharField(max_length=100)
     price = models.DecimalField(max_digits=6, decimal_places=2)
@@ -95,7 +213,7 @@ class EquipmentOption(models.Model):
     def __str__(self):
         return f"{self.name} ${self.price:.2f} (Page: {self.booking_page.name})"
 
-class OpeningHourRule(models.Model):
+class OpeningHourRule(PageVersionedModel):
     WEEKDAYS = [
         (0, "Monday"),
         (1, "Tuesday"),
@@ -119,7 +237,7 @@ class OpeningHourRule(models.Model):
     def __str__(self):
         return f"{self.get_weekday_display()} {self.start_time}-{self.end_time} (Page: {self.booking_page.name})"
 
-class HolidayException(models.Model):
+class HolidayException(PageVersionedModel, OccupancyTrackedModel):
     booking_page = models.ForeignKey("BookingPage", on_delete=models.CASCADE, related_name="holiday_exceptions")
     date = models.DateField()
     start_time = models.TimeField()
@@ -130,24 +248,80 @@ class HolidayException(models.Model):
     class Meta:
         ordering = ['booking_page', 'date', 'start_time']
 
+    def get_occupancy_days(self):
+        return [], [(self.__dict__.get("booking_page_id"), self.__dict__.get("date"))]
+
     def __str__(self):
         return f"{self.date} {self.start_time}-{self.end_time} (Page: {self.booking_page.name})"
 
-class SpecialException(models.Model):
+class SpecialException(PageVersionedModel, OccupancyTrackedModel):
+    RECURRENCE_CHOICES = [
+        ("none", "Does not repeat"),
+        ("weekly", "Weekly"),
+        ("biweekly", "Every 2 weeks"),
+    ]
+    RECURRENCE_DAYS = {"weekly": 7, "biweekly": 14}
+
     court = models.ForeignKey("Court", on_delete=models.CASCADE, related_name="special_exceptions")
     date = models.DateField()
     start_time = models.TimeField()
     end_time = models.TimeField()
     note = models.CharField(max_length=200, blank=True)
+    recurrence = models.CharField(max_length=10, choices=RECURRENCE_CHOICES, default="none")
+    until = models.DateField(null=True, blank=True)
+    excluded_dates = models.JSONField(default=list, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['court', 'date', 'start_time']
+        indexes = [
+            models.Index(fields=['court', 'date'], condition=~models.Q(recurrence="none"), name='special_exc_recurring_idx'),
+        ]
+
+    def get_page_filter(self):
+        return {"courts": self.court_id}
+
+    @property
+    def is_recurring(self):
+        return self.recurrence in self.RECURRENCE_DAYS
+
+    def occurrences(self, start_date, end_date):
+        # Steps straight to the first occurrence inside the window, so dates
+        # outside [start_date, end_date] are never visited.
+        if not self.is_recurring:
+            return [self.date] if start_date <= self.date <= end_date else []
+
+        step = self.RECURRENCE_DAYS[self.recurrence]
+        last = min(end_date, self.until) if self.until else end_date
+        first = max(start_date, self.date)
+        first += timedelta(days=-(first - self.date).days % step)
+        excluded = set(self.excluded_dates or [])
+        return [
+            first + timedelta(days=offset)
+            for offset in range(0, (last - first).days + 1, step)
+            if (first + timedelta(days=offset)).isoformat() not in excluded
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.is_recurring:
+                # Waits for bookings in flight on the days it may cover (see create_booking).
+                rows = CourtOccupancy.objects.select_for_update().filter(court_id=self.court_id, date__gte=self.date).order_by("id")
+                if self.until:
+                    rows = rows.filter(date__lte=self.until)
+                list(rows.values_list("id", flat=True))
+            super().save(*args, **kwargs)
+
+    def get_occupancy_days(self):
+        # Recurring exceptions are expanded at read time and never written to the ledger.
+        if self.__dict__.get("recurrence") in self.RECURRENCE_DAYS:
+            return [], []
+        return [(self.__dict__.get("court_id"), self.__dict__.get("date"))], []
 
     def __str__(self):
         return f"{self.date} {self.start_time}-{self.end_time} (Court: {self.court.name} / Page: {self.court.booking_page.name})"
 
-class Booking(models.Model):
+class Booking(OccupancyTrackedModel):
     PAYMENT_STATUS_CHOICES = [
         ("unpaid", "Unpaid"),
         ("paid", "Paid"),
@@ -161,11 +335,26 @@ class Booking(models.Model):
     player_email = models.EmailField()
     player_phone = models.CharField(max_length=30)
     payment_status = models.CharField(max_length=10, choices=PAYMENT_STATUS_CHOICES, default="unpaid")
+    amount = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    hold_expires_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-date', 'start_time']
-        indexes = [models.Index(fields=["court", "date"]),]
+        indexes = [
+            models.Index(fields=["court", "date"]),
+            models.Index(fields=["hold_expires_at"], condition=models.Q(payment_status="unpaid", hold_expires_at__isnull=False), name="booking_unpaid_hold_idx"),
+        ]
+
+    def get_occupancy_days(self):
+        return [(self.__dict__.get("court_id"), self.__dict__.get("date"))], []
+
+    def refresh_occupancy(self):
+        from core.utils.rollups import refresh_rollups
+
+        court_days, page_days = super().refresh_occupancy()
+        refresh_rollups(court_days)
+        return court_days, page_days
 
     def __str__(self):
         return f"{self.date} {self.start_time}-{self.end_time} (Court: {self.court.name} / Page: {self.court.booking_page.name})"
@@ -181,4 +370,79 @@ class BookingEquipmentOption(models.Model):
         constraints = [models.UniqueConstraint(fields=['booking', 'equipment_option'], name='unique_booking_equipment_option')]
 
     def __str__(self):
-        return f"{self.quantity} * {self.equipment_option.name} for booking on {self.booking.date} (Court: {self.booking.court.name} / Page: {self.booking.court.booking_page.name})"
\ No newline at end of file
+        return f"{self.quantity} * {self.equipment_option.name} for booking on {self.booking.date} (Court: {self.booking.court.name} / Page: {self.booking.court.booking_page.name})"
+
+class CourtOccupancy(models.Model):
+    court = models.ForeignKey("Court", on_delete=models.CASCADE, related_name="occupancies")
+    date = models.DateField()
+    slot_size = models.PositiveIntegerField()
+    busy_mask = models.BigIntegerField(default=0)
+    held_mask = models.BigIntegerField(default=0)
+    held_until = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['court', 'date']
+        constraints = [models.UniqueConstraint(fields=['court', 'date'], name='unique_court_occupancy_date')]
+
+    def __str__(self):
+        return f"{self.date} {self.busy_mask:b} (Court: {self.court.name} / Page: {self.court.booking_page.name})"
+
+
+class CourtDailyRollup(models.Model):
+    court = models.ForeignKey("Court", on_delete=models.CASCADE, related_name="daily_rollups")
+    date = models.DateField()
+    booking_count = models.PositiveIntegerField(default=0)
+    paid_count = models.PositiveIntegerField(default=0)
+    unpaid_count = models.PositiveIntegerField(default=0)
+    booked_minutes = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['court', 'date']
+        constraints = [models.UniqueConstraint(fields=['court', 'date'], name='unique_court_daily_rollup_date')]
+
+    def __str__(self):
+        return f"{self.date} {self.booking_count} bookings ${self.revenue:.2f} (Court: {self.court.name} / Page: {self.court.booking_page.name})"
+
+class StripeEvent(models.Model):
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    account = models.CharField(max_length=128, blank=True)
+    payload = models.JSONField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['received_at']
+        indexes = [models.Index(fields=["received_at"], condition=models.Q(processed_at__isnull=True), name="stripe_event_pending_idx")]
+
+    def __str__(self):
+        return f"{self.type} {self.event_id}"
+
+class WizardDraft(models.Model):
+    organiser = models.OneToOneField("Organiser", on_delete=models.CASCADE, related_name="wizard_draft")
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    expires_at = models.DateTimeField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['organiser']
+
+    def __str__(self):
+        return f"Draft of {self.organiser.email} (expires {self.expires_at})"
+
+class WizardDraftItem(models.Model):
+    # One court, equipment option or exception added in the create wizard, so
+    # adding or removing one writes a single small row. Ordered by id.
+    draft = models.ForeignKey("WizardDraft", on_delete=models.CASCADE, related_name="items")
+    section = models.CharField(max_length=32)
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=["draft", "section"])]
+
+    def __str__(self):
+        return f"{self.section} item of draft {self.draft_id}"
@@ -1,3 +1,611 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync
+from concurrent.futures import ThreadPoolExecutor
+from core.db_router import PIN_COOKIE, REPLICA_ALIAS, ReplicaPinningMiddleware, lag_cache, replica_reads
+from core.forms import BookingForm
+from core.models import Booking, BookingPage, Court, CourtDailyRollup, CourtOccupancy, EquipmentOption, HolidayException, OpeningHourRule, Organiser, SlotDefinition, SpecialException, StripeEvent, WizardDraft, WizardDraftItem
+from core.utils.availability import get_page_availability, interval_mask
+from core.utils.booking_page_import import import_booking_pages
+from core.utils.bookings import SlotTaken, create_booking
+from core.utils.fake_stripe import fake_stripe_backend
+from core.utils.payments import create_checkout_session
+from core.utils.query_budget import assert_query_budgets
+from core.utils.rollups import rebuild_rollups
+from core.utils import stripe_gateway
+from core.utils.stripe_events import process_events
+from core.utils.wizard_drafts import append_draft_item, get_draft, remove_draft_item, update_draft
+from core.views import booking_page as booking_page_views
+from datetime import date, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from pathlib import Path
+from unittest import mock, skipUnless
+import asyncio
+import hashlib
+import hmac
+import json
+import stripe
+import tempfile
+import threading
+import time as clock
 
-# Create your tests here.
+DAY = date(2030, 1, 7)
+# Full pages link static files, which have no manifest until collectstatic.
+PLAIN_STATIC_STORAGES = {**settings.STORAGES, "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}}
+
+def make_page(email="organiser@example.com", public_url="club", courts=2):
+    organiser = Organiser.objects.create_user(email, "password")
+    booking_page = BookingPage.objects.create(organiser=organiser, name="Club", location="Melbourne, VIC", public_url=public_url)
+    SlotDefinition.objects.create(booking_page=booking_page, slot_size=60, price=20)
+    for weekday in range(7):
+        OpeningHourRule.objects.create(booking_page=booking_page, weekday=weekday, start_time=time(8), end_time=time(20))
+    for number in range(courts):
+        Court.objects.create(booking_page=booking_page, name=f"Court {number + 1}")
+    return booking_page
+
+def book(court, day=DAY, hour=10, **fields):
+    fields.setdefault("player_email", "player@example.com")
+    fields.setdefault("player_phone", "0400000000")
+    return create_booking(court, day, time(hour), time(hour + 1), **fields)
+
+class OccupancyTests(TestCase):
+    def test_new_court_is_blocked_on_existing_holidays(self):
+        booking_page = make_page(courts=1)
+        HolidayException.objects.create(booking_page=booking_page, date=DAY, start_time=time(8), end_time=time(20))
+
+        court = Court.objects.create(booking_page=booking_page, name="Court 9")
+
+        occupancy = CourtOccupancy.objects.get(court=court, date=DAY)
+        self.assertEqual(occupancy.busy_mask & interval_mask(600, 660, 60), interval_mask(600, 660, 60))
+        with self.assertRaises(SlotTaken):
+            book(court)
+        self.assertFalse(Booking.objects.filter(court=court).exists())
+
+class BookingFormTests(TestCase):
+    def get_form(self, day, start="10:00", end="11:00"):
+        court = make_page().courts.first()
+        data = {"court": court.id, "date": day.isoformat(), "start_time": start, "end_time": end, "player_email": "player@example.com", "player_phone": "0400000000"}
+        return BookingForm(data, courts=[court])
+
+    def test_rejects_past_dates(self):
+        self.assertFalse(self.get_form(timezone.localdate() - timedelta(days=1)).is_valid())
+
+    def test_accepts_future_dates(self):
+        self.assertTrue(self.get_form(timezone.localdate() + timedelta(days=1)).is_valid())
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBookingTests(TransactionTestCase):
+    # Hundreds of attempts at one slot, each on its own connection. They run
+    # in waves of `workers`, released together by the barrier, which keeps
+    # open connections well under PostgreSQL's default max_connections (100).
+    # Needs real row locks (PostgreSQL); see "Tests" in the README.
+    attempts = 300
+    workers = 25
+
+    def test_exactly_one_booking_wins_a_slot(self):
+        court = Court.objects.select_related("booking_page__slot_definition").get(booking_page=make_page(courts=1))
+        barrier = threading.Barrier(self.workers, timeout=60)
+
+        def attempt(index):
+            try:
+                barrier.wait()
+                return book(court, player_email=f"stress-{index}@example.com")
+            except SlotTaken:
+                return None
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(attempt, range(self.attempts)))
+
+        self.assertEqual(sum(booking is not None for booking in results), 1)
+        self.assertEqual(Booking.objects.filter(court=court, date=DAY).count(), 1)
+
+WEBHOOK_SECRET = "whsec_test"
+
+def checkout_event(event_id, event_type, booking, payment_status="paid"):
+    return {
+        "id": event_id,
+        "object": "event",
+        "type": event_type,
+        "data": {"object": {
+            "object": "checkout.session",
+            "client_reference_id": str(booking.id),
+            "metadata": {"booking_id": str(booking.id)},
+            "payment_status": payment_status,
+        }},
+    }
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class StripeWebhookReplayTests(TestCase):
+    def setUp(self):
+        self.court = make_page().courts.first()
+        self.booking = book(self.court, hold_for=timedelta(minutes=35))
+
+    def deliver(self, event):
+        payload = json.dumps(event)
+        timestamp = int(clock.time())
+        signature = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+        response = self.client.post(reverse("stripe_webhook"), payload, content_type="application/json", headers={"Stripe-Signature": f"t={timestamp},v1={signature}"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_rejects_unsigned_events(self):
+        response = self.client.post(reverse("stripe_webhook"), "{}", content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_duplicate_event_is_stored_and_applied_once(self):
+        event = checkout_event("evt_1", "checkout.session.completed", self.booking)
+        self.deliver(event)
+        self.deliver(event)
+
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.assertEqual(process_events(), 1)
+        self.assertEqual(process_events(), 0)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, "paid")
+        self.assertIsNone(self.booking.hold_expires_at)
+
+    def test_expired_after_completed_keeps_the_paid_booking(self):
+        self.deliver(checkout_event("evt_1", "checkout.session.completed", self.booking))
+        process_events()
+        self.deliver(checkout_event("evt_2", "checkout.session.expired", self.booking, payment_status="unpaid"))
+        process_events()
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, "paid")
+
+    def test_completed_and_expired_in_one_batch_pays(self):
+        self.deliver(checkout_event("evt_2", "checkout.session.expired", self.booking, payment_status="unpaid"))
+        self.deliver(checkout_event("evt_1", "checkout.session.completed", self.booking))
+        process_events()
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, "paid")
+
+    def test_completed_after_expired_flags_a_refund(self):
+        self.deliver(checkout_event("evt_2", "checkout.session.expired", self.booking, payment_status="unpaid"))
+        process_events()
+        self.deliver(checkout_event("evt_1", "checkout.session.completed", self.booking))
+        with self.assertLogs("core.utils.stripe_events", "WARNING"):
+            process_events()
+
+        self.assertFalse(Booking.objects.filter(id=self.booking.id).exists())
+
+    def test_expired_session_releases_the_hold(self):
+        occupancy = CourtOccupancy.objects.get(court=self.court, date=DAY)
+        self.assertTrue(occupancy.held_mask)
+
+        self.deliver(checkout_event("evt_1", "checkout.session.expired", self.booking, payment_status="unpaid"))
+        process_events()
+
+        self.assertFalse(Booking.objects.filter(id=self.booking.id).exists())
+        occupancy.refresh_from_db()
+        self.assertEqual((occupancy.busy_mask, occupancy.held_mask), (0, 0))
+        book(self.court)
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES, STRIPE_BREAKER_FAILURES=2, STRIPE_BREAKER_RESET_SECONDS=30)
+class StripeGatewayTests(TestCase):
+    def setUp(self):
+        stripe_gateway.breaker.reset()
+        self.addCleanup(stripe_gateway.breaker.reset)
+
+    def fail_call(self):
+        with self.assertRaises(stripe.APIConnectionError), stripe_gateway.breaker.guard():
+            raise stripe.APIConnectionError("Stripe is down")
+
+    def test_breaker_opens_and_a_trial_call_closes_it(self):
+        with mock.patch("core.utils.stripe_gateway.monotonic", return_value=100.0) as monotonic:
+            self.fail_call()
+            self.assertTrue(stripe_gateway.is_available())
+            self.fail_call()
+            self.assertFalse(stripe_gateway.is_available())
+            with self.assertRaises(stripe_gateway.StripeUnavailable):
+                stripe_gateway.breaker.acquire()
+
+            # After the reset time one trial call goes through; a failed trial
+            # opens the breaker again.
+            monotonic.return_value = 131.0
+            stripe_gateway.breaker.acquire()
+            with self.assertRaises(stripe_gateway.StripeUnavailable):
+                stripe_gateway.breaker.acquire()
+            stripe_gateway.breaker.release(False)
+            self.assertFalse(stripe_gateway.is_available())
+
+            monotonic.return_value = 162.0
+            with stripe_gateway.breaker.guard():
+                pass
+            self.assertTrue(stripe_gateway.is_available())
+            self.fail_call()
+            self.assertTrue(stripe_gateway.is_available())
+
+    def test_rejected_requests_do_not_open_the_breaker(self):
+        for _ in range(3):
+            with self.assertRaises(stripe.InvalidRequestError), stripe_gateway.breaker.guard():
+                raise stripe.InvalidRequestError("No such price", param="price")
+        self.assertTrue(stripe_gateway.is_available())
+
+    def test_repeated_checkout_replays_the_same_session(self):
+        booking_page = make_page(courts=1)
+        court = booking_page.courts.get()
+        court.booking_page = booking_page
+        booking = book(court, hold_for=timedelta(minutes=10))
+
+        create = async_to_sync(create_checkout_session)
+        with fake_stripe_backend() as server:
+            first = create(booking, "http://testserver/success", "http://testserver/cancel")
+            second = create(booking, "http://testserver/success", "http://testserver/cancel")
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(list(server.responses), [f"checkout-session-{booking.id}"])
+
+    def test_checkout_answers_503_without_holding_a_slot_while_stripe_is_down(self):
+        booking_page = make_page(courts=1)
+        data = {
+            "court": booking_page.courts.get().id,
+            "date": DAY.isoformat(),
+            "start_time": "10:00",
+            "end_time": "11:00",
+            "player_email": "player@example.com",
+            "player_phone": "0400000000",
+        }
+        with mock.patch("core.utils.stripe_gateway.monotonic", return_value=100.0):
+            self.fail_call()
+            self.fail_call()
+            response = self.client.post(reverse("book_slot", args=[booking_page.public_url]), data)
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_replaced_clients_are_closed(self):
+        timeout = settings.STRIPE_TIMEOUT_SECONDS + 1
+        replaced = stripe_gateway.get_http_client(asynchronous=False)
+        with override_settings(STRIPE_TIMEOUT_SECONDS=timeout):
+            self.assertIsNot(stripe_gateway.get_http_client(asynchronous=False), replaced)
+        self.assertTrue(replaced._client.is_closed)
+
+        async def replace_async_client():
+            replaced = stripe_gateway.get_http_client(asynchronous=True)
+            with override_settings(STRIPE_TIMEOUT_SECONDS=timeout):
+                stripe_gateway.get_http_client(asynchronous=True)
+            await asyncio.gather(*stripe_gateway.closing_tasks)
+            return replaced
+        self.assertTrue(async_to_sync(replace_async_client)()._client_async.is_closed)
+
+class RollupTests(TestCase):
+    def test_rebuild_zeroes_days_without_bookings(self):
+        booking_page = make_page(courts=1)
+        court = booking_page.courts.get()
+        book(court)
+        Booking.objects.filter(court=court).delete()
+        self.assertEqual(CourtDailyRollup.objects.get(court=court, date=DAY).booking_count, 1)
+
+        rebuild_rollups([booking_page.id])
+
+        rollup = CourtDailyRollup.objects.get(court=court, date=DAY)
+        self.assertEqual((rollup.booking_count, rollup.booked_minutes), (0, 0))
+
+class WizardDraftTests(TestCase):
+    def setUp(self):
+        self.organiser = Organiser.objects.create_user("organiser@example.com", "password")
+        self.addCleanup(cache.clear)
+
+    def test_item_edits_write_one_row_each(self):
+        update_draft(self.organiser, {"name": "Club"})
+        append_draft_item(self.organiser, "courts", {"name": "Court 1"})
+        append_draft_item(self.organiser, "equipment_options", {"name": "Racket", "price": 5.0})
+        append_draft_item(self.organiser, "courts", {"name": "Court 2"})
+        with self.assertNumQueries(5):
+            # Savepoint, draft row lock, items, item delete, release.
+            remove_draft_item(self.organiser, "courts", 0)
+
+        self.assertEqual(WizardDraft.objects.get(organiser=self.organiser).data, {"name": "Club"})
+        self.assertEqual(list(WizardDraftItem.objects.values_list("section", "data")), [
+            ("equipment_options", {"name": "Racket", "price": 5.0}),
+            ("courts", {"name": "Court 2"}),
+        ])
+        self.assertEqual(get_draft(self.organiser), {
+            "name": "Club",
+            "courts": [{"name": "Court 2"}],
+            "equipment_options": [{"name": "Racket", "price": 5.0}],
+        })
+
+    def test_steps_do_not_overwrite_items(self):
+        append_draft_item(self.organiser, "courts", {"name": "Court 1"})
+        # A step saves the whole draft it was shown, items included.
+        update_draft(self.organiser, {"name": "Club", "courts": []})
+        self.assertEqual(get_draft(self.organiser), {"name": "Club", "courts": [{"name": "Court 1"}]})
+
+    @override_settings(WIZARD_DRAFT_CACHE=True)
+    def test_cache_is_written_with_the_checkpoint(self):
+        append_draft_item(self.organiser, "courts", {"name": "Court 1"})
+        self.assertEqual(get_draft(self.organiser), {"courts": [{"name": "Court 1"}]})
+
+        # Another process's cache, or an evicted key, falls back to the table.
+        cache.clear()
+        self.assertEqual(get_draft(self.organiser), {"courts": [{"name": "Court 1"}]})
+
+    def test_expired_draft_starts_over(self):
+        append_draft_item(self.organiser, "courts", {"name": "Court 1"})
+        WizardDraft.objects.update(expires_at=timezone.now())
+        self.assertEqual(append_draft_item(self.organiser, "courts", {"name": "Court 2"}), {"courts": [{"name": "Court 2"}]})
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.booking_page = make_page()
+        self.staff = Organiser.objects.create_user("staff@example.com", "password", is_staff=True)
+        self.url = reverse("booking_page", args=[self.booking_page.public_url])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_server_timing_is_only_sent_to_staff(self):
+        self.assertFalse(self.client.get(self.url).has_header("Server-Timing"))
+
+        # Staff are recognised on pages that load the user anyway.
+        self.client.force_login(self.staff)
+        self.assertIn("total;dur=", self.client.get(reverse("dashboard"))["Server-Timing"])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_staff_check_does_not_load_the_user(self):
+        # The JSON API never loads the user, so a session cookie costs nothing.
+        url = reverse("next_slots_api", args=[self.booking_page.public_url])
+        with CaptureQueriesContext(connection) as anonymous:
+            self.client.get(url, {"start": DAY.isoformat()})
+
+        self.client.force_login(self.staff)
+        with self.assertNumQueries(len(anonymous)):
+            response = self.client.get(url, {"start": DAY.isoformat()})
+        self.assertFalse(response.has_header("Server-Timing"))
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_server_timing_can_be_sent_to_everyone(self):
+        self.assertIn("total;dur=", self.client.get(self.url)["Server-Timing"])
+
+    def test_profiles_cover_async_views(self):
+        # Under WSGI an async view runs on async_to_sync's event loop thread.
+        original = booking_page_views.get_public_booking_page
+        async def slow_get_public_booking_page(request, public_url):
+            clock.sleep(0.05)
+            return await original(request, public_url)
+
+        self.client.force_login(self.staff)
+        with tempfile.TemporaryDirectory() as profile_dir, override_settings(PROFILE_DIR=Path(profile_dir)):
+            with mock.patch.object(booking_page_views, "get_public_booking_page", slow_get_public_booking_page):
+                response = self.client.get(self.url, headers={"X-Profile": "1"})
+            profile = (Path(profile_dir) / response["X-Profile-File"]).read_text()
+        self.assertIn("core.tests:slow_get_public_booking_page", profile)
+
+class EditorQueryCountTests(TestCase):
+    # Query counts are fixed however many courts, options and exceptions a
+    # page has. They include the session and user lookups.
+    def setUp(self):
+        cache.clear()
+        self.booking_page = make_page(courts=3)
+        courts = list(self.booking_page.courts.all())
+        for number in range(3):
+            EquipmentOption.objects.create(booking_page=self.booking_page, name=f"Option {number}", price=5)
+            HolidayException.objects.create(booking_page=self.booking_page, date=DAY + timedelta(days=number), start_time=time(8), end_time=time(12))
+            SpecialException.objects.create(court=courts[number], date=DAY, start_time=time(8), end_time=time(9), recurrence="weekly")
+        self.client.force_login(self.booking_page.organiser)
+
+    def test_navigate_sections(self):
+        for section, queries in [
+            ("booking_page", 3),
+            ("courts", 5),
+            ("slot_definition", 3),
+            ("equipment_options", 5),
+            ("opening_hour_rules", 4),
+            ("holiday_exceptions", 8),
+            ("special_exceptions", 9),
+        ]:
+            with self.subTest(section=section), self.assertNumQueries(queries):
+                response = self.client.get(reverse("navigate_setting_edit", args=[self.booking_page.id, section]), headers={"HX-Request": "true"})
+                self.assertEqual(response.status_code, 200)
+
+    def test_navigate_list_section_from_cache(self):
+        url = reverse("navigate_setting_edit", args=[self.booking_page.id, "courts"])
+        self.client.get(url)
+        with self.assertNumQueries(3):
+            self.client.get(url)
+
+    def test_save_section(self):
+        with self.assertNumQueries(13):
+            response = self.client.post(reverse("save_setting_edit", args=[self.booking_page.id, "booking_page"]), {"name": "Club", "location": "Sydney, NSW"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_add_item(self):
+        with self.assertNumQueries(22):
+            response = self.client.post(reverse("add_setting_item_edit", args=[self.booking_page.id, "courts"]), {"name": "Court 9"})
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_item(self):
+        court = Court.objects.create(booking_page=self.booking_page, name="Court 9")
+        with self.assertNumQueries(15):
+            response = self.client.post(reverse("delete_setting_item_edit", args=[self.booking_page.id, "courts", court.id]))
+        self.assertEqual(response.status_code, 200)
+
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class QueryBudgetTests(TransactionTestCase):
+    # Outside TestCase's wrapping transaction, so atomic blocks cost no
+    # savepoint queries and counts match check_query_budgets in production.
+    databases = "__all__"
+
+    def test_every_url_stays_within_its_query_budget(self):
+        assert_query_budgets(host="testserver")
+
+class BookingPageImportTests(TestCase):
+    def setUp(self):
+        self.organiser = Organiser.objects.create_user("organiser@example.com", "password")
+
+    def get_page(self, **fields):
+        return {
+            "name": "Club",
+            "location": "Melbourne, VIC",
+            "courts": ["Court 1", {"name": "Court 2"}],
+            "slot_definition": {"slot_size": 60, "price": 20},
+            "opening_hour_rules": [{"weekday": "mon", "start_time": "08:00", "end_time": "20:00"}],
+            **fields,
+        }
+
+    def test_imports_a_valid_page(self):
+        created, errors = import_booking_pages(self.organiser, [self.get_page()])
+        self.assertEqual((len(created), errors), (1, []))
+        self.assertEqual(created[0].courts.count(), 2)
+
+    def test_wrongly_typed_entries_are_validation_errors(self):
+        pages = [
+            self.get_page(opening_hour_rules=[3]),
+            self.get_page(slot_definition="60"),
+            self.get_page(courts="Court 1"),
+            self.get_page(equipment_options=[["Balls", 5]]),
+            self.get_page(opening_hour_rules=[{"weekday": "mon", "start_time": 8, "end_time": {"hour": 20}}]),
+        ]
+        created, errors = import_booking_pages(self.organiser, pages)
+        self.assertEqual(created, [])
+        self.assertEqual([index for index, _, _ in errors], [1, 2, 3, 4, 5])
+
+class RecurringExceptionTests(TestCase):
+    def setUp(self):
+        self.court = make_page(courts=1).courts.get()
+
+    def create_exception(self, **fields):
+        fields = {"date": DAY, "start_time": time(10), "end_time": time(11), "recurrence": "weekly", **fields}
+        return SpecialException.objects.create(court=self.court, **fields)
+
+    def test_occurrences_stay_inside_the_window(self):
+        exception = self.create_exception(until=DAY + timedelta(days=28), excluded_dates=[(DAY + timedelta(days=14)).isoformat()])
+        self.assertEqual(
+            exception.occurrences(DAY + timedelta(days=1), DAY + timedelta(days=60)),
+            [DAY + timedelta(days=7), DAY + timedelta(days=21), DAY + timedelta(days=28)],
+        )
+        self.assertEqual(exception.occurrences(DAY + timedelta(days=8), DAY + timedelta(days=13)), [])
+
+    def test_biweekly_occurrences(self):
+        exception = self.create_exception(recurrence="biweekly")
+        self.assertEqual(exception.occurrences(DAY, DAY + timedelta(days=30)), [DAY, DAY + timedelta(days=14), DAY + timedelta(days=28)])
+
+    def test_recurring_exceptions_are_not_written_to_the_ledger(self):
+        self.create_exception()
+        self.assertFalse(CourtOccupancy.objects.filter(court=self.court).exists())
+
+    def test_occurrences_block_availability_and_bookings(self):
+        self.create_exception(excluded_dates=[(DAY + timedelta(days=14)).isoformat()])
+        availability = get_page_availability(self.court.booking_page, DAY, DAY + timedelta(days=14))
+
+        self.assertFalse(availability.is_free(self.court.id, DAY + timedelta(days=7), time(10), time(11)))
+        self.assertTrue(availability.is_free(self.court.id, DAY + timedelta(days=8), time(10), time(11)))
+        self.assertTrue(availability.is_free(self.court.id, DAY + timedelta(days=14), time(10), time(11)))
+        with self.assertRaises(SlotTaken):
+            book(self.court, DAY + timedelta(days=7))
+        book(self.court, DAY + timedelta(days=14))
+
+class NextSlotsApiTests(TestCase):
+    def setUp(self):
+        self.booking_page = make_page()
+        self.booking_page.is_active = True
+        self.booking_page.save()
+
+    def get(self, **params):
+        return self.client.get(reverse("next_slots_api", args=[self.booking_page.public_url]), params)
+
+    def test_finds_free_slots(self):
+        response = self.get(start=DAY.isoformat(), duration=120, count=2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(slot["start"], slot["end"]) for slot in response.json()["slots"]], [("08:00", "10:00"), ("08:00", "10:00")])
+
+    def test_rejects_durations_longer_than_a_day(self):
+        self.assertEqual(self.get(duration=3000000000).status_code, 400)
+        self.assertEqual(self.get(duration=24 * 60 + 60).status_code, 400)
+
+    def test_duration_longer_than_the_time_window_finds_nothing(self):
+        response = self.get(start=DAY.isoformat(), duration=240, **{"from": "10:00", "to": "12:00"})
+        self.assertEqual(response.json()["slots"], [])
+
+class VenueSearchApiTests(TestCase):
+    def setUp(self):
+        # Three venues in one suburb; only the last by name is free at 10:00.
+        self.booking_pages = []
+        for number, name in enumerate(["Ace Club", "Baseline Club", "Court Club"]):
+            booking_page = make_page(email=f"organiser{number}@example.com", public_url=f"club-{number}")
+            booking_page.name = name
+            booking_page.save()
+            self.booking_pages.append(booking_page)
+        for booking_page in self.booking_pages[:2]:
+            HolidayException.objects.create(booking_page=booking_page, date=DAY, start_time=time(8), end_time=time(20))
+
+    def get(self, **params):
+        return self.client.get(reverse("venue_search_api"), {"location": "Melbourne", "date": DAY.isoformat(), "start": "10:00", **params})
+
+    def test_free_venues_after_the_first_candidate_batch_are_found(self):
+        with mock.patch("core.utils.venue_search.VENUE_SEARCH_CANDIDATE_BATCH", 1):
+            response = self.get()
+        self.assertEqual([venue["name"] for venue in response.json()["venues"]], ["Court Club"])
+
+    def test_rejects_durations_longer_than_a_day(self):
+        self.assertEqual(self.get(duration=10 ** 12).status_code, 400)
+        self.assertEqual(self.get(duration=24 * 60 + 60).status_code, 400)
+
+@skipUnless(REPLICA_ALIAS in settings.DATABASES, "REPLICA_DATABASE_URL is not set")
+@override_settings(STORAGES=PLAIN_STATIC_STORAGES)
+class ReplicaRoutingTests(TransactionTestCase):
+    # The replica mirrors the default test database on its own connection,
+    # which only sees committed rows. The test runner rejects unknown aliases
+    # even on skipped tests.
+    databases = {"default", REPLICA_ALIAS} if REPLICA_ALIAS in settings.DATABASES else {"default"}
+
+    def setUp(self):
+        self.booking_page = make_page()
+        patcher = mock.patch.dict(lag_cache, {"checked_at": clock.monotonic(), "healthy": True})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, view, cookies=None):
+        request = RequestFactory().get("/")
+        request.COOKIES.update(cookies or {})
+        return ReplicaPinningMiddleware(view)(request)
+
+    def routed_reads(self, write=False):
+        # A @replica_reads view reporting where Booking and Organiser reads go.
+        @replica_reads
+        def view(request):
+            if write:
+                Court.objects.filter(booking_page=self.booking_page, name="Court 1").update(name="Renamed")
+            return HttpResponse(f"{router.db_for_read(Booking)} {router.db_for_read(Organiser)}")
+        return view
+
+    def test_decorated_views_read_core_models_from_the_replica(self):
+        response = self.request(self.routed_reads())
+        self.assertEqual(response.content, b"replica default")
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_views_read_from_the_primary(self):
+        response = self.request(lambda request: HttpResponse(str(router.db_for_read(Booking))))
+        self.assertEqual(response.content, b"default")
+        self.assertEqual(router.db_for_read(Booking), "default")
+
+    def test_public_booking_page_is_served_from_the_replica(self):
+        with CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica_queries:
+            response = self.client.get(reverse("booking_page", args=[self.booking_page.public_url]), {"date": DAY.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any("core_court" in query["sql"] for query in replica_queries))
+
+    def test_a_write_pins_the_client_to_the_primary(self):
+        response = self.request(self.routed_reads(write=True))
+        self.assertEqual(response.content, b"default default")
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], settings.REPLICA_LAG_TOLERANCE_SECONDS)
+
+        response = self.request(self.routed_reads(), cookies={PIN_COOKIE: "1"})
+        self.assertEqual(response.content, b"default default")
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        @replica_reads
+        def view(request):
+            with transaction.atomic():
+                return HttpResponse(router.db_for_read(Booking))
+        self.assertEqual(self.request(view).content, b"default")
+
+    def test_lagging_replica_is_skipped(self):
+        lag_cache["healthy"] = False
+        self.assertEqual(self.request(self.routed_reads()).content, b"default default")
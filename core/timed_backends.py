@@ -0,0 +1,31 @@
+from core.utils.request_timing import timed
+from django.contrib.sessions.backends.db import SessionStore as DatabaseSessionStore
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+# Session and template backends that report their time to the request's
+# Server-Timing header (see core.middleware.RequestTimingMiddleware).
+
+class SessionStore(DatabaseSessionStore):
+    def load(self):
+        with timed("session"):
+            return super().load()
+
+    async def aload(self):
+        with timed("session"):
+            return await super().aload()
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed("render"):
+            return super().render(context, request)
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
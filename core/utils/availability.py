@@ -0,0 +1,160 @@
+from core.models import BookingPage, Booking, Court, CourtOccupancy, OpeningHourRule, SpecialException
+from datetime import timedelta
+from django.db.models import Count, Max, Min, Q
+from django.utils import timezone
+
+# A court-day is a bitmask over a grid anchored at midnight: bit i is the slot
+# [i * slot_size, (i + 1) * slot_size) in minutes. With 30 minute slots a day
+# fits in 48 bits, so whole days are combined with single integer operations.
+# Busy masks (bookings, live holds, special and holiday exceptions) are read from the
+# CourtOccupancy ledger maintained by core.utils.occupancy. Recurring special
+# exceptions are stored once and OR-ed in per query window instead.
+
+def to_minutes(value):
+    return value.hour * 60 + value.minute
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+def interval_mask(start, end, slot_size):
+    # Slots touched by [start, end), i.e. slots an exception or booking blocks.
+    if end <= start:
+        return 0
+    first = start // slot_size
+    last = -(-end // slot_size)
+    return (1 << last) - (1 << first)
+
+def window_mask(start, end, slot_size):
+    # Slots lying entirely inside [start, end), i.e. slots an opening rule offers.
+    first = -(-start // slot_size)
+    last = end // slot_size
+    if last <= first:
+        return 0
+    return (1 << last) - (1 << first)
+
+def mask_to_slots(mask, slot_size):
+    slots = []
+    while mask:
+        low = mask & -mask
+        slots.append((low.bit_length() - 1) * slot_size)
+        mask ^= low
+    return slots
+
+def daterange(start_date, end_date):
+    for offset in range((end_date - start_date).days + 1):
+        yield start_date + timedelta(days=offset)
+
+def blocking_bookings(now=None):
+    return Booking.objects.exclude(payment_status="refunded").exclude(hold_expires_at__lte=now or timezone.now())
+
+def effective_busy_mask(busy_mask, held_mask, held_until, now=None):
+    # Holds only block while the latest hold on the court-day is still live;
+    # expired ones are reclaimed by the sweeper or by the next booking attempt.
+    if held_until and held_until > (now or timezone.now()):
+        return busy_mask | held_mask
+    return busy_mask
+
+def recurring_exceptions(court_ids, start_date, end_date):
+    return SpecialException.objects.filter(
+        Q(until__isnull=True) | Q(until__gte=start_date),
+        court_id__in=court_ids,
+        date__lte=end_date,
+    ).exclude(recurrence="none")
+
+def recurring_exception_masks(court_ids, start_date, end_date, slot_sizes):
+    masks = {}
+    for exception in recurring_exceptions(court_ids, start_date, end_date):
+        mask = interval_mask(to_minutes(exception.start_time), to_minutes(exception.end_time), slot_sizes[exception.court_id])
+        for day in exception.occurrences(start_date, end_date):
+            key = (exception.court_id, day)
+            masks[key] = masks.get(key, 0) | mask
+    return masks
+
+class PageAvailability:
+    def __init__(self, booking_page, courts, start_date, end_date):
+        self.booking_page = booking_page
+        self.slot_size = booking_page.slot_definition.slot_size
+        self.courts = courts
+        self.start_date = start_date
+        self.end_date = end_date
+        self.open_masks = {}
+        self.busy_masks = {}
+
+    def open_mask(self, day):
+        return self.open_masks.get(day.weekday(), 0)
+
+    def free_mask(self, court_id, day):
+        return self.open_mask(day) & ~self.busy_masks.get((court_id, day), 0)
+
+    def free_slots(self, court_id, day):
+        return mask_to_slots(self.free_mask(court_id, day), self.slot_size)
+
+    def is_free(self, court_id, day, start, end):
+        needed = interval_mask(to_minutes(start), to_minutes(end), self.slot_size)
+        return bool(needed) and self.free_mask(court_id, day) & needed == needed
+
+    def grid(self, day):
+        open_slots = mask_to_slots(self.open_mask(day), self.slot_size)
+        free = {court.id: self.free_mask(court.id, day) for court in self.courts}
+        return [
+            {
+                "start": format_minutes(start),
+                "end": format_minutes(start + self.slot_size),
+                "courts": [
+                    {"court": court, "free": bool(free[court.id] >> (start // self.slot_size) & 1)}
+                    for court in self.courts
+                ],
+            }
+            for start in open_slots
+        ]
+
+def load_availability(booking_page_ids, start_date, end_date):
+    booking_pages = BookingPage.objects.filter(id__in=booking_page_ids, slot_definition__isnull=False).select_related("slot_definition")
+    courts = Court.objects.filter(booking_page_id__in=booking_page_ids)
+
+    results = {}
+    for booking_page in booking_pages:
+        results[booking_page.id] = PageAvailability(booking_page, [], start_date, end_date)
+
+    for court in courts:
+        if court.booking_page_id in results:
+            results[court.booking_page_id].courts.append(court)
+
+    page_ids = list(results)
+
+    for rule in OpeningHourRule.objects.filter(booking_page_id__in=page_ids):
+        availability = results[rule.booking_page_id]
+        availability.open_masks[rule.weekday] = window_mask(to_minutes(rule.start_time), to_minutes(rule.end_time), availability.slot_size)
+
+    occupancies = CourtOccupancy.objects.filter(
+        court__booking_page_id__in=page_ids,
+        date__range=(start_date, end_date),
+    ).values_list("court__booking_page_id", "court_id", "date", "busy_mask", "held_mask", "held_until")
+    now = timezone.now()
+    for booking_page_id, court_id, day, busy_mask, held_mask, held_until in occupancies:
+        results[booking_page_id].busy_masks[(court_id, day)] = effective_busy_mask(busy_mask, held_mask, held_until, now)
+
+    court_pages = {court.id: availability for availability in results.values() for court in availability.courts}
+    slot_sizes = {court_id: availability.slot_size for court_id, availability in court_pages.items()}
+    for (court_id, day), mask in recurring_exception_masks(list(court_pages), start_date, end_date, slot_sizes).items():
+        busy_masks = court_pages[court_id].busy_masks
+        busy_masks[(court_id, day)] = busy_masks.get((court_id, day), 0) | mask
+
+    return results
+
+def get_page_availability(booking_page, start_date, end_date):
+    return load_availability([booking_page.id], start_date, end_date).get(booking_page.id)
+
+async def get_availability_etag(booking_page_id, version, start_date, end_date, now=None):
+    # Settings writes bump BookingPage.version and every ledger change stamps
+    # updated_at, so one aggregate over the window identifies its content.
+    # The next live hold expiry is included because it frees slots by itself.
+    now = now or timezone.now()
+    ledger = await CourtOccupancy.objects.filter(court__booking_page_id=booking_page_id, date__range=(start_date, end_date)).aaggregate(
+        rows=Count("id"),
+        updated_at=Max("updated_at"),
+        next_expiry=Min("held_until", filter=Q(held_until__gt=now)),
+    )
+    stamps = [ledger["updated_at"], ledger["next_expiry"]]
+    stamps = "-".join(f"{stamp.timestamp():.6f}" if stamp else "0" for stamp in stamps)
+    return f'"{booking_page_id}-{version}-{start_date:%Y%m%d}-{end_date:%Y%m%d}-{ledger["rows"]}-{stamps}"'
@@ -0,0 +1,103 @@
+from core.models import Booking, BookingEquipmentOption
+from datetime import timezone as dt_timezone
+from django.db.models import Prefetch
+from django.utils import timezone
+import csv
+
+# Exports stream straight from a chunked iterator (a server-side cursor on
+# PostgreSQL); equipment is prefetched per chunk, so memory stays bounded
+# by EXPORT_CHUNK_SIZE rather than by the page's booking history.
+
+EXPORT_CHUNK_SIZE = 2000
+
+CSV_HEADER = [
+    "id", "court", "date", "start_time", "end_time", "player_email", "player_phone",
+    "payment_status", "amount", "equipment", "created_at",
+]
+
+class Echo:
+    def write(self, value):
+        return value
+
+def export_bookings_queryset(booking_page, using=None):
+    return (
+        Booking.objects.using(using)
+        .filter(court__booking_page=booking_page)
+        .select_related("court")
+        .prefetch_related(Prefetch(
+            "booking_equipment_options",
+            queryset=BookingEquipmentOption.objects.select_related("equipment_option").order_by("equipment_option__name"),
+        ))
+        .order_by("date", "start_time", "id")
+    )
+
+def iter_bookings(booking_page, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    return export_bookings_queryset(booking_page, using).iterator(chunk_size=chunk_size)
+
+def format_equipment(booking):
+    return "; ".join(
+        f"{item.equipment_option.name} x{item.quantity}"
+        for item in booking.booking_equipment_options.all()
+    )
+
+def stream_csv(booking_page, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_HEADER)
+    for booking in iter_bookings(booking_page, chunk_size, using):
+        yield writer.writerow([
+            booking.id,
+            booking.court.name,
+            booking.date.isoformat(),
+            booking.start_time.strftime("%H:%M"),
+            booking.end_time.strftime("%H:%M"),
+            booking.player_email,
+            booking.player_phone,
+            booking.payment_status,
+            booking.amount,
+            format_equipment(booking),
+            timezone.localtime(booking.created_at).isoformat(),
+        ])
+
+def escape_ics(value):
+    return str(value).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+def fold_ics(line):
+    # RFC 5545 lines stay under 75 octets; continuations start with a space.
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts = []
+    while len(encoded) > 75:
+        cut = 75 if not parts else 74
+        while cut and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    parts.append(encoded.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+def stream_ics(booking_page, domain, chunk_size=EXPORT_CHUNK_SIZE, using=None):
+    yield fold_ics("BEGIN:VCALENDAR")
+    yield fold_ics("VERSION:2.0")
+    yield fold_ics("PRODID:-//Court Booking//Bookings Export//EN")
+    yield fold_ics(f"X-WR-CALNAME:{escape_ics(booking_page.name)}")
+
+    for booking in iter_bookings(booking_page, chunk_size, using):
+        created_at = booking.created_at.astimezone(dt_timezone.utc)
+        summary = f"{booking.court.name} - {booking.player_email}"
+        description = f"Phone: {booking.player_phone}, Payment: {booking.payment_status} {booking.amount}, Equipment: {format_equipment(booking) or '-'}"
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:booking-{booking.id}@{domain}",
+            f"DTSTAMP:{created_at:%Y%m%dT%H%M%SZ}",
+            f"DTSTART:{booking.date:%Y%m%d}T{booking.start_time:%H%M%S}",
+            f"DTEND:{booking.date:%Y%m%d}T{booking.end_time:%H%M%S}",
+            f"SUMMARY:{escape_ics(summary)}",
+            f"LOCATION:{escape_ics(booking_page.location)}",
+            f"DESCRIPTION:{escape_ics(description)}",
+            f"STATUS:{'CANCELLED' if booking.payment_status == 'refunded' else 'CONFIRMED'}",
+            "END:VEVENT",
+        ]
+        yield "".join(fold_ics(line) for line in lines)
+
+    yield fold_ics("END:VCALENDAR")
@@ -0,0 +1,193 @@
+from core.forms import BookingPageForm, CourtForm, SlotDefinitionForm, EquipmentOptionForm, OpeningHourRuleForm
+from core.models import BookingPage, Court, SlotDefinition, EquipmentOption, OpeningHourRule
+from django.db import transaction
+import csv
+import io
+import json
+import secrets
+
+WEEKDAY_NAMES = {name[:3].lower(): weekday for weekday, name in OpeningHourRule.WEEKDAYS}
+
+def generate_public_urls(count):
+    public_urls = set()
+    while len(public_urls) < count:
+        candidates = {secrets.token_urlsafe(8) for _ in range(count - len(public_urls))}
+        taken = set(BookingPage.objects.filter(public_url__in=candidates).values_list("public_url", flat=True))
+        public_urls |= candidates - taken
+    return list(public_urls)
+
+def create_booking_page(organiser, setting, public_url, is_active=False):
+    with transaction.atomic():
+        booking_page = BookingPage.objects.create(
+            organiser=organiser,
+            name=setting["name"],
+            location=setting["location"],
+            public_url=public_url,
+            is_active=is_active
+        )
+
+        Court.objects.bulk_create([
+            Court(booking_page=booking_page, name=court["name"])
+            for court in setting["courts"]
+        ])
+
+        SlotDefinition.objects.create(
+            booking_page=booking_page,
+            slot_size=setting["slot_definition"]["slot_size"],
+            price=setting["slot_definition"]["price"]
+        )
+
+        EquipmentOption.objects.bulk_create([
+            EquipmentOption(booking_page=booking_page, name=option["name"], price=option["price"])
+            for option in setting.get("equipment_options", [])
+        ])
+
+        OpeningHourRule.objects.bulk_create([
+            OpeningHourRule(booking_page=booking_page, weekday=rule["weekday"], start_time=rule["start_time"], end_time=rule["end_time"])
+            for rule in setting["opening_hour_rules"]
+        ])
+
+    return booking_page
+
+def get_form_errors(form, label):
+    return [f"{label}: {error}" for errors in form.errors.values() for error in errors]
+
+def get_entries(data, key, label, errors):
+    entries = data.get(key) or []
+    if not isinstance(entries, list):
+        errors.append(f"{label}: Expected a list.")
+        return []
+    return entries
+
+def as_form_data(entry, label, errors):
+    # Uploaded JSON can hold any type where a form expects text.
+    if not isinstance(entry, dict):
+        errors.append(f"{label}: Expected an object, got {json.dumps(entry)[:50]}.")
+        return None
+    return {key: value if value is None else str(value) for key, value in entry.items()}
+
+def validate_booking_page(data):
+    errors = []
+    setting = {"courts": [], "equipment_options": [], "opening_hour_rules": []}
+
+    form = BookingPageForm(data)
+    if form.is_valid():
+        setting.update(form.cleaned_data)
+    errors += get_form_errors(form, "Page")
+
+    for court in get_entries(data, "courts", "Courts", errors):
+        court = as_form_data({"name": court} if isinstance(court, str) else court, "Court", errors)
+        if court is None:
+            continue
+        form = CourtForm(court)
+        if form.is_valid():
+            setting["courts"].append(form.cleaned_data)
+        errors += get_form_errors(form, "Court")
+
+    slot_definition = as_form_data(data.get("slot_definition") or {}, "Slot definition", errors)
+    if slot_definition is not None:
+        form = SlotDefinitionForm(slot_definition)
+        if form.is_valid():
+            setting["slot_definition"] = {"slot_size": int(form.cleaned_data["slot_size"]), "price": form.cleaned_data["price"]}
+        errors += get_form_errors(form, "Slot definition")
+
+    for option in get_entries(data, "equipment_options", "Equipment options", errors):
+        option = as_form_data(option, "Equipment option", errors)
+        if option is None:
+            continue
+        form = EquipmentOptionForm(option)
+        if form.is_valid():
+            setting["equipment_options"].append(form.cleaned_data)
+        errors += get_form_errors(form, "Equipment option")
+
+    for rule in get_entries(data, "opening_hour_rules", "Opening hour rules", errors):
+        rule = as_form_data(rule, "Opening hour rule", errors)
+        if rule is None:
+            continue
+        weekday = rule.get("weekday")
+        if isinstance(weekday, str) and weekday[:3].lower() in WEEKDAY_NAMES:
+            weekday = WEEKDAY_NAMES[weekday[:3].lower()]
+        form = OpeningHourRuleForm({**rule, "weekday": weekday})
+        if form.is_valid():
+            if form.cleaned_data["weekday"] not in dict(OpeningHourRule.WEEKDAYS):
+                errors.append(f"Opening hour rule: Invalid weekday {weekday}.")
+            elif not form.cleaned_data.get("start_time") or not form.cleaned_data.get("end_time"):
+                errors.append("Opening hour rule: Start and end time are required.")
+            else:
+                setting["opening_hour_rules"].append(form.cleaned_data)
+        errors += get_form_errors(form, "Opening hour rule")
+
+    if not setting["courts"]:
+        errors.append("At least one court is required.")
+    if not setting["opening_hour_rules"]:
+        errors.append("At least one opening hour rule is required.")
+
+    court_names = [court["name"] for court in setting["courts"]]
+    if len(court_names) != len(set(court_names)):
+        errors.append("Court names must be unique.")
+    option_names = [option["name"] for option in setting["equipment_options"]]
+    if len(option_names) != len(set(option_names)):
+        errors.append("Equipment option names must be unique.")
+    weekdays = [rule["weekday"] for rule in setting["opening_hour_rules"]]
+    if len(weekdays) != len(set(weekdays)):
+        errors.append("Each weekday can only have one opening hour rule.")
+
+    return setting, errors
+
+def split_list(value, separator=";"):
+    return [item.strip() for item in (value or "").split(separator) if item.strip()]
+
+def parse_csv_row(row):
+    # name,location,courts,slot_size,price,equipment_options,opening_hour_rules
+    # "Court 1;Court 2"  "Balls:5;Racket:10"  "mon=08:00-22:00;sat=07:00-20:00"
+    equipment_options = []
+    for item in split_list(row.get("equipment_options")):
+        name, _, price = item.rpartition(":")
+        equipment_options.append({"name": name.strip(), "price": price.strip()})
+
+    opening_hour_rules = []
+    for item in split_list(row.get("opening_hour_rules")):
+        weekday, _, hours = item.partition("=")
+        start_time, _, end_time = hours.partition("-")
+        opening_hour_rules.append({"weekday": weekday.strip(), "start_time": start_time.strip(), "end_time": end_time.strip()})
+
+    return {
+        "name": row.get("name", ""),
+        "location": row.get("location", ""),
+        "courts": split_list(row.get("courts")),
+        "slot_definition": {"slot_size": row.get("slot_size", ""), "price": row.get("price", "")},
+        "equipment_options": equipment_options,
+        "opening_hour_rules": opening_hour_rules,
+    }
+
+def parse_booking_pages(content, file_format):
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if file_format == "csv":
+        return [parse_csv_row(row) for row in csv.DictReader(io.StringIO(content))]
+
+    data = json.loads(content)
+    if isinstance(data, dict):
+        data = data.get("booking_pages", [])
+    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+        raise ValueError("Expected a list of booking pages")
+    return data
+
+def import_booking_pages(organiser, pages, is_active=False):
+    valid_settings = []
+    errors = []
+    for index, data in enumerate(pages, start=1):
+        setting, page_errors = validate_booking_page(data)
+        if page_errors:
+            errors.append((index, data.get("name", ""), page_errors))
+        else:
+            valid_settings.append(setting)
+
+    public_urls = generate_public_urls(len(valid_settings))
+    created = [
+        create_booking_page(organiser, setting, public_url, is_active=is_active)
+        for setting, public_url in zip(valid_settings, public_urls)
+    ]
+
+    return created, errors
@@ -0,0 +1,68 @@
+from core.models import Booking, OpeningHourRule
+from core.utils.availability import effective_busy_mask, interval_mask, recurring_exception_masks, to_minutes, window_mask
+from core.utils.occupancy import lock_occupancy, refresh_occupancy
+from core.utils.rollups import refresh_rollups
+from django.db import transaction
+from django.utils import timezone
+
+class SlotTaken(Exception):
+    pass
+
+def create_booking(court, day, start_time, end_time, hold_for=None, **fields):
+    slot_definition = court.booking_page.slot_definition
+    slot_size = slot_definition.slot_size
+    needed = interval_mask(to_minutes(start_time), to_minutes(end_time), slot_size)
+
+    rule = OpeningHourRule.objects.filter(booking_page_id=court.booking_page_id, weekday=day.weekday()).first()
+    open_mask = window_mask(to_minutes(rule.start_time), to_minutes(rule.end_time), slot_size) if rule else 0
+    if not needed or open_mask & needed != needed:
+        raise SlotTaken("This time is outside the opening hours.")
+
+    fields.setdefault("amount", slot_definition.price * needed.bit_count())
+    if hold_for is not None:
+        fields["hold_expires_at"] = timezone.now() + hold_for
+
+    # Only the (court, date) ledger row is locked, so bookings for other
+    # courts and days never wait on each other.
+    with transaction.atomic():
+        key = (court.id, day)
+        occupancy = lock_occupancy({key}, {court.id: slot_size})[key]
+        # Recurring exceptions are not on the ledger. Saving one locks the
+        # court's ledger rows (SpecialException.save), so this check runs
+        # under the same lock.
+        if recurring_exception_masks([court.id], day, day, {court.id: slot_size}).get((court.id, day), 0) & needed:
+            raise SlotTaken("This time is blocked by the venue.")
+        if occupancy.held_mask & needed and release_expired_holds(court_days={key}):
+            occupancy = refresh_occupancy([key])[key]
+
+        busy_mask = effective_busy_mask(occupancy.busy_mask, occupancy.held_mask, occupancy.held_until)
+        if busy_mask & needed:
+            raise SlotTaken("This slot has just been taken.")
+
+        booking = Booking.objects.create(court=court, date=day, start_time=start_time, end_time=end_time, **fields)
+
+    return booking
+
+def expired_holds(now=None):
+    return Booking.objects.filter(payment_status="unpaid", hold_expires_at__isnull=False, hold_expires_at__lte=now or timezone.now())
+
+def release_expired_holds(court_days=None, batch_size=1000, now=None):
+    holds = expired_holds(now)
+    if court_days is not None:
+        holds = holds.filter(court_id__in={court_id for court_id, _ in court_days}, date__in={day for _, day in court_days})
+
+    released = 0
+    while True:
+        with transaction.atomic():
+            rows = list(holds.order_by("hold_expires_at").values_list("id", "court_id", "date")[:batch_size])
+            if not rows:
+                break
+            Booking.objects.filter(id__in=[row[0] for row in rows]).delete()
+            court_days = {(court_id, day) for _, court_id, day in rows}
+            refresh_occupancy(court_days)
+            refresh_rollups(court_days)
+        released += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    return released
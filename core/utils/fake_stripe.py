@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from core.utils.stripe_gateway import breaker
+from django.test.utils import override_settings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+import json
+import re
+import secrets
+import sys
+import threading
+import time
+
+# A local stand-in for the Stripe API calls this app makes, for benchmarks
+# and manual runs (STRIPE_API_BASE). It answers like Stripe after an optional
+# delay, replays the response of a repeated Idempotency-Key, and answers every
+# request with fail_status (e.g. 503) while that is set, to rehearse outages.
+# fake_stripe_backend() points the gateway at one for tests and benchmarks.
+
+METADATA_PARAM = re.compile(r"^metadata\[(?P<key>[^\]]+)\]$")
+
+class FakeStripeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Request-Id", f"req_{secrets.token_hex(7)}")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_error_json(self, status, error_type, message):
+        self.send_json(status, {"error": {"type": error_type, "message": message}})
+
+    def do_POST(self):
+        params = dict(parse_qsl(self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            return self.send_error_json(401, "invalid_request_error", "You did not provide an API key.")
+        if self.server.fail_status:
+            return self.send_error_json(self.server.fail_status, "api_error", "The fake Stripe API is failing on purpose.")
+        if self.path != "/v1/checkout/sessions":
+            return self.send_error_json(404, "invalid_request_error", f"Unrecognized request URL (POST: {self.path}).")
+
+        idempotency_key = self.headers.get("Idempotency-Key")
+        if idempotency_key in self.server.responses:
+            return self.send_json(200, self.server.responses[idempotency_key])
+
+        session_id = f"cs_test_{secrets.token_hex(16)}"
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "livemode": False,
+            "mode": params.get("mode", "payment"),
+            "status": "open",
+            "payment_status": "unpaid",
+            "currency": params.get("line_items[0][price_data][currency]"),
+            "amount_total": int(params.get("line_items[0][price_data][unit_amount]", 0)) * int(params.get("line_items[0][quantity]", 1)),
+            "customer_email": params.get("customer_email"),
+            "client_reference_id": params.get("client_reference_id"),
+            "metadata": {match["key"]: value for key, value in params.items() if (match := METADATA_PARAM.match(key))},
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "expires_at": int(params.get("expires_at") or time.time() + 24 * 3600),
+            "url": f"{self.server.url}/c/pay/{session_id}",
+        }
+        if idempotency_key:
+            self.server.responses[idempotency_key] = session
+        self.send_json(200, session)
+
+class FakeStripeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_status=None):
+        super().__init__((host, port), FakeStripeHandler)
+        self.latency = latency
+        self.fail_status = fail_status
+        self.responses = {}
+
+    def handle_error(self, request, client_address):
+        # Clients that timed out and hung up are expected, not errors.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+@contextmanager
+def fake_stripe_backend(latency=0.0, **overrides):
+    # Runs the gateway against a local FakeStripeServer, for benchmarks and tests.
+    server = FakeStripeServer(latency=latency).start()
+    breaker.reset()
+    try:
+        with override_settings(STRIPE_API_BASE=server.url, STRIPE_SECRET_KEY="sk_test_fake", **overrides):
+            yield server
+    finally:
+        server.stop()
+        breaker.reset()
@@ -0,0 +1,43 @@
+from core.utils.availability import blocking_bookings
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rendered editor lists are cached under BookingPage.version, which every
+# write to courts, equipment, rules and exceptions bumps in the same
+# transaction, so a new version simply misses. Exception lists also show
+# clashes with upcoming bookings, which don't bump the version; their key
+# adds today's date and a signature of the blocking bookings in the window.
+
+LIST_SECTIONS = {"courts", "equipment_options", "holiday_exceptions", "special_exceptions"}
+CLASH_SECTIONS = {"holiday_exceptions", "special_exceptions"}
+
+def get_booking_signature(booking_page, start_date, end_date):
+    bookings = blocking_bookings().filter(court__booking_page=booking_page, date__range=(start_date, end_date))
+    signature = bookings.aggregate(count=Count("id"), max_id=Max("id"), id_sum=Sum("id"))
+    return f"{signature['count']}.{signature['max_id'] or 0}.{signature['id_sum'] or 0}"
+
+def get_fragment_key(booking_page, section, clash_window_days):
+    key = f"settings-list:{booking_page.id}:{booking_page.version}:{section}"
+    if section in CLASH_SECTIONS:
+        today = timezone.localdate()
+        key += f":{today:%Y%m%d}:{get_booking_signature(booking_page, today, today + timedelta(days=clash_window_days))}"
+    return key
+
+def get_fragment(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        logger.warning("Fragment cache unavailable", exc_info=True)
+        return None
+
+def set_fragment(key, html):
+    try:
+        cache.set(key, str(html), timeout=settings.SETTINGS_FRAGMENT_CACHE_SECONDS)
+    except Exception:
+        logger.warning("Fragment cache unavailable", exc_info=True)
@@ -0,0 +1,103 @@
+from core.models import HolidayException, bump_page_version
+from core.utils.availability import daterange
+from core.utils.occupancy import refresh_occupancy
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.db import transaction
+from django.utils import timezone
+
+FULL_DAY = (time(0, 0), time(23, 59))
+
+def unfold_lines(lines):
+    # RFC 5545 folds long lines; a continuation starts with a space or tab.
+    current = None
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8-sig")
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current:
+        yield current
+
+def parse_property(line):
+    name_params, _, value = line.partition(":")
+    name, *params = name_params.split(";")
+    return name.upper(), dict(param.split("=", 1) for param in params if "=" in param), value
+
+def parse_value(value, params):
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d").date()
+
+    parsed = datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        parsed = timezone.localtime(parsed.replace(tzinfo=dt_timezone.utc))
+    return parsed
+
+def unescape(value):
+    return value.replace("\\n", " ").replace("\\N", " ").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+def expand_event(start, end, note):
+    if not isinstance(start, datetime):
+        last = (end - timedelta(days=1)) if end else start
+        for day in daterange(start, max(start, last)):
+            yield day, *FULL_DAY, note
+        return
+
+    end = end or start
+    for day in daterange(start.date(), end.date()):
+        start_time = start.time().replace(second=0, microsecond=0) if day == start.date() else FULL_DAY[0]
+        end_time = end.time().replace(second=0, microsecond=0) if day == end.date() else FULL_DAY[1]
+        if start_time < end_time:
+            yield day, start_time, end_time, note
+
+def parse_ics(lines):
+    event = None
+    for line in unfold_lines(lines):
+        if line.upper() == "BEGIN:VEVENT":
+            event = {}
+        elif line.upper() == "END:VEVENT":
+            if event and event.get("DTSTART"):
+                yield from expand_event(event["DTSTART"], event.get("DTEND"), event.get("SUMMARY", "")[:200])
+            event = None
+        elif event is not None:
+            name, params, value = parse_property(line)
+            if name in ("DTSTART", "DTEND"):
+                try:
+                    event[name] = parse_value(value, params)
+                except ValueError:
+                    event = {}
+            elif name == "SUMMARY":
+                event[name] = unescape(value)
+
+def import_holidays(booking_pages, lines):
+    booking_page_ids = [booking_page.id for booking_page in booking_pages]
+    holidays = {}
+    for day, start_time, end_time, note in parse_ics(lines):
+        holidays.setdefault((day, start_time), (end_time, note))
+
+    if not holidays or not booking_page_ids:
+        return 0
+
+    dates = [day for day, _ in holidays]
+    existing = set(
+        HolidayException.objects
+        .filter(booking_page_id__in=booking_page_ids, date__range=(min(dates), max(dates)))
+        .values_list("booking_page_id", "date", "start_time")
+    )
+    new_holidays = [
+        HolidayException(booking_page_id=booking_page_id, date=day, start_time=start_time, end_time=end_time, note=note)
+        for booking_page_id in booking_page_ids
+        for (day, start_time), (end_time, note) in holidays.items()
+        if (booking_page_id, day, start_time) not in existing
+    ]
+
+    with transaction.atomic():
+        HolidayException.objects.bulk_create(new_holidays, batch_size=1000)
+        refresh_occupancy(page_days={(holiday.booking_page_id, holiday.date) for holiday in new_holidays})
+        bump_page_version(id__in={holiday.booking_page_id for holiday in new_holidays})
+
+    return len(new_holidays)
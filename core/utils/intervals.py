@@ -0,0 +1,96 @@
+from bisect import bisect_left
+from core.utils.availability import blocking_bookings, to_minutes
+
+# Overlap questions on exact start/end times (not the slot grid) go through a
+# per court-day index: intervals sorted by start with a running max of ends
+# for listing overlaps, plus a merged copy for walking a day grid. Building is
+# O(n log n), a point query O(log n + k) and a whole-day grid walk
+# O(slots + n), instead of comparing every slot with every row. The editor's
+# clash marking (find_exception_clashes) builds one index per court-day for
+# the clash window; `manage.py bench_intervals` compares it with row scans.
+
+class IntervalIndex:
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals, key=lambda interval: interval[:2])
+        self.starts = [start for start, _, _ in intervals]
+        self.ends = [end for _, end, _ in intervals]
+        self.items = [item for _, _, item in intervals]
+
+        self.max_ends = []
+        self.merged_starts = []
+        self.merged_ends = []
+        for start, end, _ in intervals:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+            if self.merged_ends and start <= self.merged_ends[-1]:
+                self.merged_ends[-1] = max(self.merged_ends[-1], end)
+            else:
+                self.merged_starts.append(start)
+                self.merged_ends.append(end)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end):
+        overlaps = []
+        index = bisect_left(self.starts, end) - 1
+        while index >= 0 and self.max_ends[index] > start:
+            if self.ends[index] > start:
+                overlaps.append(self.items[index])
+            index -= 1
+        return overlaps[::-1]
+
+    def free_starts(self, open_start, open_end, slot_size):
+        # Slots on the midnight-anchored grid lying inside the opening window
+        # and touching no interval.
+        free = []
+        index = 0
+        start = -(-open_start // slot_size) * slot_size
+        while start + slot_size <= open_end:
+            while index < len(self.merged_ends) and self.merged_ends[index] <= start:
+                index += 1
+            if index < len(self.merged_starts) and self.merged_starts[index] < start + slot_size:
+                start = max(start + slot_size, -(-self.merged_ends[index] // slot_size) * slot_size)
+                continue
+            free.append(start)
+            start += slot_size
+        return free
+
+def build_indexes(rows):
+    intervals = {}
+    for key, start_time, end_time, item in rows:
+        start, end = to_minutes(start_time), to_minutes(end_time)
+        if start < end:
+            intervals.setdefault(key, []).append((start, end, item))
+    return {key: IntervalIndex(court_day_intervals) for key, court_day_intervals in intervals.items()}
+
+def exception_rows(courts, holiday_exceptions, special_exceptions, start_date, end_date):
+    page_courts = {}
+    for court in courts:
+        page_courts.setdefault(court.booking_page_id, []).append(court.id)
+
+    for exception in holiday_exceptions:
+        if start_date <= exception.date <= end_date:
+            for court_id in page_courts.get(exception.booking_page_id, []):
+                yield (court_id, exception.date), exception.start_time, exception.end_time, exception
+
+    for exception in special_exceptions:
+        for day in exception.occurrences(start_date, end_date):
+            yield (exception.court_id, day), exception.start_time, exception.end_time, exception
+
+def booking_rows(court_ids, start_date, end_date):
+    bookings = blocking_bookings().filter(court_id__in=court_ids, date__range=(start_date, end_date)).only("id", "court_id", "date", "start_time", "end_time")
+    for booking in bookings:
+        yield (booking.court_id, booking.date), booking.start_time, booking.end_time, booking
+
+def find_exception_clashes(courts, holiday_exceptions=(), special_exceptions=(), start_date=None, end_date=None):
+    # Bookings that an exception would block, keyed by exception; one booking
+    # query for the window no matter how many exceptions are checked.
+    indexes = build_indexes(booking_rows([court.id for court in courts], start_date, end_date))
+    clashes = {}
+    for key, start_time, end_time, exception in exception_rows(courts, holiday_exceptions, special_exceptions, start_date, end_date):
+        index = indexes.get(key)
+        if index:
+            overlaps = index.overlapping(to_minutes(start_time), to_minutes(end_time))
+            if overlaps:
+                clashes.setdefault(exception, []).extend(overlaps)
+    return clashes
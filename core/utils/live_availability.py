@@ -0,0 +1,189 @@
+from asgiref.sync import sync_to_async
+from core.models import BookingPage
+from core.utils.availability import format_minutes
+from django.conf import settings
+from django.db import connections, transaction
+import asyncio
+import json
+import logging
+import re
+import redis
+import redis.asyncio
+import time
+
+logger = logging.getLogger(__name__)
+
+# Open public pages keep a server-sent-events stream per BookingPage. Streams
+# are served by config.asgi ahead of Django's request handling, so an idle
+# connection costs a queue and a coroutine rather than a thread and a database
+# connection. Ledger refreshes publish per court-day deltas once committed:
+# through Redis pub/sub when a broker is configured, read by one subscription
+# per worker, otherwise straight to the streams of the current process.
+
+STREAM_PATH = re.compile(r"^/api/availability/(?P<public_url>[^/]+)/stream/$")
+CHANNEL_PREFIX = "availability:"
+QUEUE_SIZE = 100
+PAGE_ID_TTL_SECONDS = 60
+RESYNC = "resync"
+
+def slot_times(mask, slot_size):
+    times = []
+    while mask:
+        low = mask & -mask
+        times.append(format_minutes((low.bit_length() - 1) * slot_size))
+        mask ^= low
+    return times
+
+def occupancy_delta(booking_page_id, row, old_mask, new_mask):
+    taken, freed = new_mask & ~old_mask, old_mask & ~new_mask
+    if not taken and not freed:
+        return None
+    return {
+        "booking_page": booking_page_id,
+        "court": row.court_id,
+        "date": row.date.isoformat(),
+        "taken": slot_times(taken, row.slot_size),
+        "freed": slot_times(freed, row.slot_size),
+    }
+
+class Broker:
+    def __init__(self):
+        self.subscribers = {}
+        self.loop = None
+        self.listener = None
+
+    def subscribe(self, booking_page_id):
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(QUEUE_SIZE)
+        self.subscribers.setdefault(booking_page_id, set()).add(queue)
+        if settings.LIVE_AVAILABILITY_BROKER_URL and (self.listener is None or self.listener.done()):
+            self.listener = asyncio.create_task(self.listen(settings.LIVE_AVAILABILITY_BROKER_URL))
+        return queue
+
+    def unsubscribe(self, booking_page_id, queue):
+        queues = self.subscribers.get(booking_page_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[booking_page_id]
+
+    def deliver(self, booking_page_id, message):
+        for queue in list(self.subscribers.get(booking_page_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client this far behind reloads its grid instead.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def deliver_threadsafe(self, booking_page_id, message):
+        loop = self.loop
+        if loop is not None and not loop.is_closed() and booking_page_id in self.subscribers:
+            loop.call_soon_threadsafe(self.deliver, booking_page_id, message)
+
+    async def listen(self, url):
+        while True:
+            try:
+                async with redis.asyncio.from_url(url) as client, client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                    async for message in pubsub.listen():
+                        if message["type"] == "pmessage":
+                            booking_page_id = int(message["channel"].decode().removeprefix(CHANNEL_PREFIX))
+                            self.deliver(booking_page_id, message["data"].decode())
+            except Exception:
+                logger.warning("Live availability broker unavailable, retrying", exc_info=True)
+                await asyncio.sleep(1)
+
+broker = Broker()
+publisher = {}
+
+def send_deltas(deltas):
+    url = settings.LIVE_AVAILABILITY_BROKER_URL
+    try:
+        if url and "client" not in publisher:
+            publisher["client"] = redis.Redis.from_url(url)
+        for delta in deltas:
+            message = json.dumps(delta)
+            if url:
+                publisher["client"].publish(f"{CHANNEL_PREFIX}{delta['booking_page']}", message)
+            else:
+                broker.deliver_threadsafe(delta["booking_page"], message)
+    except Exception:
+        logger.warning("Could not publish live availability", exc_info=True)
+
+def publish_deltas(deltas):
+    deltas = [delta for delta in deltas if delta]
+    if deltas:
+        transaction.on_commit(lambda: send_deltas(deltas))
+
+page_ids = {}
+
+def load_page_id(public_url):
+    # Streams live for hours, so the lookup must not leave a connection behind.
+    try:
+        return BookingPage.objects.filter(public_url=public_url, is_active=True).values_list("id", flat=True).first()
+    finally:
+        connections.close_all()
+
+async def get_stream_page_id(public_url):
+    # Clients reconnecting together (after a deploy) share one lookup per page.
+    now = time.monotonic()
+    cached = page_ids.get(public_url)
+    if cached is None or cached[0] < now:
+        if len(page_ids) > 1000:
+            for key in [key for key, (expires, _) in page_ids.items() if expires < now]:
+                del page_ids[key]
+        cached = page_ids[public_url] = (now + PAGE_ID_TTL_SECONDS, asyncio.ensure_future(sync_to_async(load_page_id, thread_sensitive=False)(public_url)))
+    try:
+        return await asyncio.shield(cached[1])
+    except Exception:
+        page_ids.pop(public_url, None)
+        raise
+
+async def wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+def format_event(message):
+    if message == RESYNC:
+        return b"event: resync\ndata: {}\n\n"
+    return f"event: slots\ndata: {message}\n\n".encode()
+
+async def stream_availability(scope, receive, send, public_url):
+    booking_page_id = await get_stream_page_id(public_url)
+    if booking_page_id is None:
+        await send({"type": "http.response.start", "status": 404, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b"Booking page not found"})
+        return
+
+    queue = broker.subscribe(booking_page_id)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    getter = None
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b"retry: 5000\n\n", "more_body": True})
+
+        while True:
+            getter = getter or asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, disconnected}, timeout=settings.LIVE_AVAILABILITY_KEEPALIVE_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                break
+            if getter in done:
+                body, getter = format_event(getter.result()), None
+            else:
+                body = b": keepalive\n\n"
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+    finally:
+        for task in (getter, disconnected):
+            if task is not None:
+                task.cancel()
+        broker.unsubscribe(booking_page_id, queue)
@@ -0,0 +1,211 @@
+from collections import Counter
+from core.models import Booking, BookingEquipmentOption, BookingPage, HolidayException, Organiser, SpecialException
+from core.utils.booking_page_import import create_booking_page
+from core.utils.occupancy import rebuild_occupancy, refresh_occupancy
+from core.utils.query_log import collect_queries
+from core.utils.rollups import rebuild_rollups, refresh_rollups
+from datetime import date, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+from time import perf_counter
+import itertools
+import random
+import statistics
+import threading
+
+# Load tests run against a dedicated organiser whose pages look like busy
+# clubs: a week of opening hours, equipment, public holidays, a recurring
+# maintenance block and bookings over the next `days` days. Checkout requests
+# book the days after that horizon, so every attempt hits a free slot, and
+# are removed once the run is over.
+
+LOAD_TEST_EMAIL = "loadtest@example.com"
+CHECKOUT_EMAIL_DOMAIN = "loadtest.example.com"
+LOCATIONS = ["Melbourne, VIC", "St Kilda, VIC", "Sydney, NSW", "Manly, NSW", "Brisbane, QLD"]
+OPEN_HOUR, CLOSE_HOUR = 7, 22
+EDITOR_SECTIONS = [
+    "booking_page",
+    "courts",
+    "slot_definition",
+    "equipment_options",
+    "opening_hour_rules",
+    "holiday_exceptions",
+    "special_exceptions",
+]
+
+def percentile(values, pct):
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1] if len(values) > 1 else values[0]
+
+def clear_dataset():
+    Organiser.objects.filter(email=LOAD_TEST_EMAIL).delete()
+
+def seed_dataset(pages=10, courts=6, days=60, occupancy=0.4, seed=1):
+    rng = random.Random(seed)
+    clear_dataset()
+    organiser = Organiser.objects.create_user(LOAD_TEST_EMAIL)
+    today = date.today()
+
+    booking_pages = []
+    for number in range(pages):
+        booking_pages.append(create_booking_page(organiser, {
+            "name": f"Load Test Club {number}",
+            "location": rng.choice(LOCATIONS),
+            "courts": [{"name": f"Court {index + 1}"} for index in range(courts)],
+            "slot_definition": {"slot_size": 60, "price": Decimal("25.00")},
+            "equipment_options": [{"name": "Racquet", "price": Decimal("5.00")}, {"name": "Ball can", "price": Decimal("3.00")}],
+            "opening_hour_rules": [{"weekday": weekday, "start_time": time(OPEN_HOUR), "end_time": time(CLOSE_HOUR)} for weekday in range(7)],
+        }, public_url=f"loadtest-{number}", is_active=True))
+
+    holidays = {today + timedelta(days=offset) for offset in range(0, days, 30)}
+    bookings, equipment = [], []
+    with transaction.atomic():
+        for booking_page in booking_pages:
+            page_courts = list(booking_page.courts.all())
+            racquet = booking_page.equipment_options.get(name="Racquet")
+            HolidayException.objects.bulk_create([
+                HolidayException(booking_page=booking_page, date=day, start_time=time(OPEN_HOUR), end_time=time(CLOSE_HOUR), note="Public holiday")
+                for day in holidays
+            ])
+            SpecialException.objects.create(
+                court=page_courts[0], date=today, start_time=time(OPEN_HOUR), end_time=time(OPEN_HOUR + 2),
+                note="Resurfacing", recurrence="weekly", until=today + timedelta(days=days),
+            )
+
+            for court, offset, hour in itertools.product(page_courts, range(days), range(OPEN_HOUR, CLOSE_HOUR)):
+                day = today + timedelta(days=offset)
+                if day in holidays or (court == page_courts[0] and day.weekday() == today.weekday() and hour < OPEN_HOUR + 2):
+                    continue
+                if rng.random() < occupancy:
+                    booking = Booking(
+                        court=court, date=day, start_time=time(hour), end_time=time(hour + 1),
+                        player_email=f"player{rng.randrange(500)}@example.com", player_phone="0400000000",
+                        payment_status="paid" if rng.random() < 0.9 else "unpaid", amount=Decimal("25.00"),
+                    )
+                    bookings.append(booking)
+                    if rng.random() < 0.2:
+                        equipment.append((booking, racquet))
+
+        Booking.objects.bulk_create(bookings, batch_size=1000)
+        BookingEquipmentOption.objects.bulk_create(
+            [BookingEquipmentOption(booking=booking, equipment_option=option) for booking, option in equipment],
+            batch_size=1000,
+        )
+
+    page_ids = [booking_page.id for booking_page in booking_pages]
+    rebuild_occupancy(page_ids)
+    rebuild_rollups(page_ids)
+    return {"pages": len(booking_pages), "courts": pages * courts, "bookings": len(bookings)}
+
+def load_context(days):
+    organiser = Organiser.objects.filter(email=LOAD_TEST_EMAIL).first()
+    if not organiser:
+        return None
+    pages = [
+        {"id": booking_page.id, "public_url": booking_page.public_url, "courts": [court.id for court in booking_page.courts.all()]}
+        for booking_page in BookingPage.objects.filter(organiser=organiser).prefetch_related("courts").order_by("id")
+    ]
+    return {"organiser": organiser, "pages": pages, "days": days, "today": date.today()}
+
+def dashboard_request(context, index):
+    return "get", reverse("dashboard"), None, {}
+
+def editor_request(context, index):
+    page = context["pages"][index % len(context["pages"])]
+    section = EDITOR_SECTIONS[index // len(context["pages"]) % len(EDITOR_SECTIONS)]
+    return "get", reverse("navigate_setting_edit", args=[page["id"], section]), None, {"HX-Request": "true"}
+
+def availability_request(context, index):
+    page = context["pages"][index % len(context["pages"])]
+    start = context["today"] + timedelta(days=index * 7 % max(context["days"] - 6, 1))
+    end = start + timedelta(days=6)
+    return "get", f"{reverse('availability_api', args=[page['public_url']])}?start={start:%Y-%m-%d}&end={end:%Y-%m-%d}", None, {}
+
+def checkout_request(context, index):
+    # Each index maps to its own (page, court, day, hour) after the seeded horizon.
+    page = context["pages"][index % len(context["pages"])]
+    slot = index // len(context["pages"])
+    hours = CLOSE_HOUR - OPEN_HOUR
+    court = page["courts"][slot % len(page["courts"])]
+    hour = OPEN_HOUR + slot // len(page["courts"]) % hours
+    day = context["today"] + timedelta(days=context["days"] + 1 + slot // (len(page["courts"]) * hours))
+    return "post", reverse("book_slot", args=[page["public_url"]]), {
+        "court": court,
+        "date": day.isoformat(),
+        "start_time": f"{hour:02d}:00",
+        "end_time": f"{hour + 1:02d}:00",
+        "player_email": f"player{index}@{CHECKOUT_EMAIL_DOMAIN}",
+        "player_phone": "0400000000",
+    }, {}
+
+SCENARIOS = {
+    "dashboard": (dashboard_request, True),
+    "editor": (editor_request, True),
+    "availability": (availability_request, False),
+    "checkout": (checkout_request, False),
+}
+
+def summarize(samples, elapsed):
+    latencies = [latency * 1000 for latency, _, _ in samples]
+    queries = [count for _, count, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(status >= 400 for _, _, status in samples),
+        "statuses": dict(sorted(Counter(str(status) for _, _, status in samples).items())),
+        "throughput": round(len(samples) / elapsed, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 2),
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2),
+        },
+        "queries": {"mean": round(statistics.fmean(queries), 2), "max": max(queries)},
+    }
+
+def run_scenario(name, context, requests, concurrency, warmup=0, host="localhost"):
+    build, login = SCENARIOS[name]
+    indexes = itertools.count()
+    samples = []
+
+    def get_client():
+        client = Client(headers={"host": host}, raise_request_exception=False)
+        if login:
+            client.force_login(context["organiser"])
+        return client
+
+    def send(client, index):
+        method, path, data, headers = build(context, index)
+        with collect_queries() as log:
+            started = perf_counter()
+            response = getattr(client, method)(path, data, headers=headers)
+            latency = perf_counter() - started
+        return latency, log.count, response.status_code
+
+    client = get_client()
+    for _ in range(warmup):
+        send(client, next(indexes))
+
+    stop = warmup + requests
+
+    def worker():
+        client = get_client()
+        while (index := next(indexes)) < stop:
+            samples.append(send(client, index))
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, perf_counter() - started)
+
+def remove_checkout_bookings():
+    bookings = Booking.objects.filter(player_email__endswith=f"@{CHECKOUT_EMAIL_DOMAIN}")
+    court_days = set(bookings.values_list("court_id", "date"))
+    bookings.delete()
+    refresh_occupancy(court_days)
+    refresh_rollups(court_days)
+    return len(court_days)
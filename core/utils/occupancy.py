@@ -0,0 +1,185 @@
+from core.models import Court, CourtOccupancy, HolidayException, OpeningHourRule, SpecialException
+from core.utils.availability import blocking_bookings, effective_busy_mask, interval_mask, recurring_exception_masks, to_minutes, window_mask
+from core.utils.live_availability import occupancy_delta, publish_deltas
+from django.db import transaction
+from django.db.models import Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+EMPTY_OCCUPANCY = (0, 0, None)
+
+def get_courts(court_ids=None, booking_page_ids=None):
+    courts = Court.objects.filter(booking_page__slot_definition__isnull=False).select_related("booking_page__slot_definition")
+    if court_ids is not None:
+        courts = courts.filter(id__in=court_ids)
+    if booking_page_ids is not None:
+        courts = courts.filter(booking_page_id__in=booking_page_ids)
+    return list(courts)
+
+def compute_occupancy(courts, dates=None, since=None):
+    slot_sizes = {court.id: court.booking_page.slot_definition.slot_size for court in courts}
+    page_courts = {}
+    for court in courts:
+        page_courts.setdefault(court.booking_page_id, []).append(court.id)
+
+    holiday_exceptions = HolidayException.objects.filter(booking_page_id__in=page_courts)
+    special_exceptions = SpecialException.objects.filter(court_id__in=slot_sizes, recurrence="none")
+    bookings = blocking_bookings().filter(court_id__in=slot_sizes)
+    if dates is not None:
+        holiday_exceptions = holiday_exceptions.filter(date__in=dates)
+        special_exceptions = special_exceptions.filter(date__in=dates)
+        bookings = bookings.filter(date__in=dates)
+    if since is not None:
+        holiday_exceptions = holiday_exceptions.filter(date__gte=since)
+        special_exceptions = special_exceptions.filter(date__gte=since)
+        bookings = bookings.filter(date__gte=since)
+
+    occupancy = {}
+
+    def add(court_id, day, start, end, hold_expires_at=None):
+        key = (court_id, day)
+        busy_mask, held_mask, held_until = occupancy.get(key, (0, 0, None))
+        mask = interval_mask(to_minutes(start), to_minutes(end), slot_sizes[court_id])
+        if hold_expires_at is None:
+            busy_mask |= mask
+        else:
+            held_mask |= mask
+            held_until = max(held_until or hold_expires_at, hold_expires_at)
+        occupancy[key] = (busy_mask, held_mask, held_until)
+
+    for booking_page_id, day, start, end in holiday_exceptions.values_list("booking_page_id", "date", "start_time", "end_time"):
+        for court_id in page_courts[booking_page_id]:
+            add(court_id, day, start, end)
+
+    for court_id, day, start, end in special_exceptions.values_list("court_id", "date", "start_time", "end_time"):
+        add(court_id, day, start, end)
+
+    for court_id, day, start, end, hold_expires_at in bookings.values_list("court_id", "date", "start_time", "end_time", "hold_expires_at"):
+        add(court_id, day, start, end, hold_expires_at)
+
+    return occupancy
+
+def lock_occupancy(court_days, slot_sizes):
+    court_ids = {court_id for court_id, _ in court_days}
+    dates = {day for _, day in court_days}
+
+    CourtOccupancy.objects.bulk_create(
+        [CourtOccupancy(court_id=court_id, date=day, slot_size=slot_sizes[court_id]) for court_id, day in court_days],
+        ignore_conflicts=True,
+    )
+    rows = CourtOccupancy.objects.select_for_update().filter(court_id__in=court_ids, date__in=dates).order_by("id")
+    return {(row.court_id, row.date): row for row in rows if (row.court_id, row.date) in court_days}
+
+def refresh_occupancy(court_days=(), page_days=()):
+    court_days = {(court_id, day) for court_id, day in court_days if court_id and day}
+    page_dates = {}
+    for booking_page_id, day in page_days:
+        if booking_page_id and day:
+            page_dates.setdefault(booking_page_id, set()).add(day)
+
+    courts = {court.id: court for court in get_courts(court_ids={court_id for court_id, _ in court_days})}
+    if page_dates:
+        for court in get_courts(booking_page_ids=page_dates):
+            courts[court.id] = court
+            court_days.update((court.id, day) for day in page_dates[court.booking_page_id])
+
+    court_days = {(court_id, day) for court_id, day in court_days if court_id in courts}
+    if not court_days:
+        return
+
+    slot_sizes = {court.id: court.booking_page.slot_definition.slot_size for court in courts.values()}
+    with transaction.atomic():
+        rows = lock_occupancy(court_days, slot_sizes)
+        occupancy = compute_occupancy(list(courts.values()), dates={day for _, day in court_days})
+
+        now = timezone.now()
+        changed, deltas = [], []
+        for key, row in rows.items():
+            values = (slot_sizes[row.court_id], *occupancy.get(key, EMPTY_OCCUPANCY))
+            if (row.slot_size, row.busy_mask, row.held_mask, row.held_until) != values:
+                old_mask = effective_busy_mask(row.busy_mask, row.held_mask, row.held_until, now)
+                resized = row.slot_size != values[0]
+                row.slot_size, row.busy_mask, row.held_mask, row.held_until = values
+                row.updated_at = now
+                changed.append(row)
+                if not resized:
+                    new_mask = effective_busy_mask(row.busy_mask, row.held_mask, row.held_until, now)
+                    deltas.append(occupancy_delta(courts[row.court_id].booking_page_id, row, old_mask, new_mask))
+        CourtOccupancy.objects.bulk_update(changed, ["slot_size", "busy_mask", "held_mask", "held_until", "updated_at"])
+        publish_deltas(deltas)
+
+    return rows
+
+def rebuild_occupancy(booking_page_ids=None, since=None):
+    courts = get_courts(booking_page_ids=booking_page_ids)
+    page_courts = {}
+    for court in courts:
+        page_courts.setdefault(court.booking_page_id, []).append(court)
+
+    rebuilt = 0
+    for booking_page_id, page_court_list in page_courts.items():
+        with transaction.atomic():
+            existing = CourtOccupancy.objects.filter(court__booking_page_id=booking_page_id)
+            if since is not None:
+                existing = existing.filter(date__gte=since)
+            existing.delete()
+
+            occupancy = compute_occupancy(page_court_list, since=since)
+            slot_size = page_court_list[0].booking_page.slot_definition.slot_size
+            CourtOccupancy.objects.bulk_create(
+                [
+                    CourtOccupancy(court_id=court_id, date=day, slot_size=slot_size, busy_mask=busy_mask, held_mask=held_mask, held_until=held_until)
+                    for (court_id, day), (busy_mask, held_mask, held_until) in occupancy.items()
+                ],
+                batch_size=1000,
+            )
+            rebuilt += len(occupancy)
+
+    return rebuilt
+
+def check_occupancy(booking_page_ids=None, since=None):
+    courts = get_courts(booking_page_ids=booking_page_ids)
+    expected = compute_occupancy(courts, since=since)
+    slot_sizes = {court.id: court.booking_page.slot_definition.slot_size for court in courts}
+
+    stored = CourtOccupancy.objects.filter(court_id__in=slot_sizes)
+    if since is not None:
+        stored = stored.filter(date__gte=since)
+
+    mismatches = []
+    seen = set()
+    rows = stored.values_list("court_id", "date", "slot_size", "busy_mask", "held_mask", "held_until")
+    for court_id, day, slot_size, *values in rows.iterator():
+        key = (court_id, day)
+        seen.add(key)
+        if tuple(values) != expected.get(key, EMPTY_OCCUPANCY) or slot_size != slot_sizes[court_id]:
+            mismatches.append((court_id, day, tuple(values), expected.get(key, EMPTY_OCCUPANCY)))
+
+    for key, values in expected.items():
+        if key not in seen and values != EMPTY_OCCUPANCY:
+            mismatches.append((key[0], key[1], None, values))
+
+    return mismatches
+
+def is_slot_free(court, day, start, end):
+    occupancy = CourtOccupancy.objects.filter(court_id=court.id, date=day)
+    rule = (
+        OpeningHourRule.objects
+        .filter(booking_page_id=court.booking_page_id, weekday=day.weekday(), booking_page__slot_definition__isnull=False)
+        .select_related("booking_page__slot_definition")
+        .annotate(
+            busy_mask=Coalesce(Subquery(occupancy.values("busy_mask")[:1]), Value(0)),
+            held_mask=Coalesce(Subquery(occupancy.values("held_mask")[:1]), Value(0)),
+            held_until=Subquery(occupancy.values("held_until")[:1]),
+        )
+        .first()
+    )
+    if not rule:
+        return False
+
+    slot_size = rule.booking_page.slot_definition.slot_size
+    open_mask = window_mask(to_minutes(rule.start_time), to_minutes(rule.end_time), slot_size)
+    busy_mask = effective_busy_mask(rule.busy_mask, rule.held_mask, rule.held_until)
+    busy_mask |= recurring_exception_masks([court.id], day, day, {court.id: slot_size}).get((court.id, day), 0)
+    needed = interval_mask(to_minutes(start), to_minutes(end), slot_size)
+    return bool(needed) and (open_mask & ~busy_mask) & needed == needed
@@ -0,0 +1,52 @@
+from core.utils import stripe_gateway
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal("1")))
+
+def get_checkout_params(booking, success_url, cancel_url):
+    booking_page = booking.court.booking_page
+    params = {
+        "mode": "payment",
+        "line_items": [{
+            "price_data": {
+                "currency": settings.STRIPE_CURRENCY,
+                "product_data": {"name": f"{booking_page.name} - {booking.court.name} {booking.date} {booking.start_time:%H:%M}-{booking.end_time:%H:%M}"},
+                "unit_amount": to_cents(booking.amount),
+            },
+            "quantity": 1,
+        }],
+        "customer_email": booking.player_email,
+        "client_reference_id": str(booking.id),
+        "metadata": {"booking_id": str(booking.id)},
+        "success_url": success_url,
+        "cancel_url": cancel_url,
+    }
+
+    # Close the checkout before the hold lapses so a payment can never land on
+    # a slot the sweeper has already released.
+    if booking.hold_expires_at:
+        params["expires_at"] = int((booking.hold_expires_at - timedelta(minutes=settings.SLOT_HOLD_GRACE_MINUTES)).timestamp())
+
+    stripe_account = booking_page.organiser.stripe_user_id
+    if stripe_account:
+        params["stripe_account"] = stripe_account
+        params["payment_intent_data"] = {
+            "application_fee_amount": to_cents(booking.amount * Decimal(settings.STRIPE_APPLICATION_FEE_PERCENT) / 100),
+        }
+
+    return params
+
+async def create_checkout_session(booking, success_url, cancel_url):
+    params = get_checkout_params(booking, success_url, cancel_url)
+    stripe_account = params.pop("stripe_account", None)
+    # One key per booking: a retried or repeated create returns the same session.
+    return await stripe_gateway.call_async(
+        "checkout.sessions",
+        "create",
+        params,
+        idempotency_key=f"checkout-session-{booking.id}",
+        stripe_account=stripe_account,
+    )
@@ -0,0 +1,204 @@
+from config import urls
+from core.models import BookingPage, Court, HolidayException, StripeEvent
+from core.utils.fake_stripe import fake_stripe_backend
+from core.utils.load_test import CHECKOUT_EMAIL_DOMAIN, load_context, remove_checkout_bookings, seed_dataset
+from core.utils.query_log import collect_queries
+from core.utils.wizard_drafts import clear_draft
+from datetime import timedelta
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.urls import URLPattern, reverse
+import hashlib
+import hmac
+import json
+import time
+
+# Every named URL in config/urls.py declares how many queries one request may
+# run against the load-test dataset (see core.utils.load_test). Budgets are
+# fixed numbers, so a query added per court, booking or exception shows up as
+# an overrun. Included URLconfs (admin, allauth) are not covered.
+
+BUDGET_EVENT_ID = "evt_query_budget"
+BUDGET_COURT_NAME = "Query budget court"
+HOLIDAY_ICS = (
+    b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nDTSTART;VALUE=DATE:20991225\r\n"
+    b"DTEND;VALUE=DATE:20991226\r\nSUMMARY:Query budget holiday\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+)
+
+def case(budget, method="get", kwargs=None, query="", data=None, headers=None, login=True, label=None):
+    return {
+        "budget": budget,
+        "method": method,
+        "kwargs": kwargs or (lambda context: {}),
+        "query": query,
+        "data": data,
+        "headers": headers or {},
+        "login": login,
+        "label": label,
+    }
+
+def page_id(context):
+    return {"booking_page_id": context["page"].id}
+
+def public_url(context):
+    return {"public_url": context["page"].public_url}
+
+def checkout_data(context):
+    day = context["today"] + timedelta(days=context["days"] + 1)
+    return {
+        "court": context["courts"][0].id,
+        "date": day.isoformat(),
+        "start_time": "10:00",
+        "end_time": "11:00",
+        "player_email": f"budget@{CHECKOUT_EMAIL_DOMAIN}",
+        "player_phone": "0400000000",
+    }
+
+def signed_webhook(context):
+    payload = json.dumps({"id": BUDGET_EVENT_ID, "object": "event", "type": "checkout.session.expired", "data": {"object": {"metadata": {}}}})
+    timestamp = int(time.time())
+    signature = hmac.new(context["webhook_secret"].encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return payload, {"Stripe-Signature": f"t={timestamp},v1={signature}"}
+
+QUERY_BUDGETS = {
+    "dashboard": [case(3)],
+    "monitor": [case(8, kwargs=page_id)],
+    "export_bookings": [
+        # One equipment prefetch per EXPORT_CHUNK_SIZE bookings.
+        case(6, kwargs=lambda context: {**page_id(context), "file_format": "csv"}, label="csv"),
+        case(6, kwargs=lambda context: {**page_id(context), "file_format": "ics"}, label="ics"),
+    ],
+    "booking_page": [case(8, kwargs=public_url, login=False)],
+    "venue_search_api": [case(6, query="location={location}&start=10:00", login=False)],
+    "availability_api": [case(8, kwargs=public_url, query="start={today}&end={week_end}", login=False)],
+    "next_slots_api": [case(7, kwargs=public_url, query="duration=60", login=False)],
+    "book_slot": [case(21, "post", kwargs=public_url, data=checkout_data, login=False)],
+    "stripe_webhook": [case(2, "post", login=False)],
+    "import_setting": [case(2)],
+    "launch_setting_create": [case(3)],
+    "launch_setting_edit": [case(4, kwargs=page_id)],
+    "navigate_setting_create": [case(4, kwargs=lambda context: {"direction": "next"}, query="current=booking_page")],
+    "navigate_setting_edit": [
+        case(budget, kwargs=lambda context, section=section: {**page_id(context), "section": section}, headers={"HX-Request": "true"}, label=section)
+        for section, budget in [
+            ("booking_page", 4),
+            ("courts", 6),
+            ("slot_definition", 4),
+            ("equipment_options", 6),
+            ("opening_hour_rules", 4),
+            ("holiday_exceptions", 9),
+            ("special_exceptions", 10),
+        ]
+    ],
+    "save_setting_edit": [
+        case(8, "post", kwargs=lambda context: {**page_id(context), "section": "booking_page"}, data=lambda context: {"name": context["page"].name, "location": context["page"].location}),
+    ],
+    # Item edits insert or delete one WizardDraftItem under the draft's row
+    # lock; the first one creates the draft.
+    "add_setting_item_create": [case(8, "post", kwargs=lambda context: {"section": "courts"}, data=lambda context: {"name": BUDGET_COURT_NAME})],
+    # A new court's occupancy on the page's holidays is refreshed in one batch.
+    "add_setting_item_edit": [
+        case(21, "post", kwargs=lambda context: {**page_id(context), "section": "courts"}, data=lambda context: {"name": BUDGET_COURT_NAME}),
+    ],
+    "import_holiday_exceptions": [
+        case(22, "post", kwargs=page_id, data=lambda context: {"file": SimpleUploadedFile("holidays.ics", HOLIDAY_ICS, "text/calendar")}),
+    ],
+    "delete_setting_item_create": [case(6, "post", kwargs=lambda context: {"section": "courts", "index": 0})],
+    "delete_setting_item_edit": [
+        case(16, "post", kwargs=lambda context: {
+            **page_id(context),
+            "section": "courts",
+            "object_id": Court.objects.filter(booking_page=context["page"], name=BUDGET_COURT_NAME).values_list("id", flat=True).first() or 0,
+        }),
+    ],
+}
+
+def get_url_names():
+    return [pattern.name for pattern in urls.urlpatterns if isinstance(pattern, URLPattern) and pattern.name]
+
+def get_budget_context(days=60):
+    context = load_context(days)
+    if not context or not context["pages"]:
+        seed_dataset(pages=3, days=days)
+        context = load_context(days)
+    page = BookingPage.objects.get(id=context["pages"][0]["id"])
+    return {
+        **context,
+        "page": page,
+        "courts": list(page.courts.order_by("id")),
+        "location": page.location.split(",")[0],
+        "week_end": context["today"] + timedelta(days=6),
+        "webhook_secret": "whsec_query_budget",
+    }
+
+def run_case(client, name, budget_case, context):
+    path = reverse(name, kwargs=budget_case["kwargs"](context))
+    if budget_case["query"]:
+        path += "?" + budget_case["query"].format(**context)
+
+    if name == "stripe_webhook":
+        body, headers = signed_webhook(context)
+        request = lambda: client.post(path, body, content_type="application/json", headers=headers)
+    elif budget_case["method"] == "post":
+        data = budget_case["data"](context) if budget_case["data"] else {}
+        request = lambda: client.post(path, data, headers=budget_case["headers"])
+    else:
+        request = lambda: client.get(path, headers=budget_case["headers"])
+
+    with collect_queries() as log:
+        response = request()
+        if response.streaming:
+            b"".join(response.streaming_content)
+    return {
+        "name": name,
+        "label": budget_case["label"],
+        "path": path,
+        "status": response.status_code,
+        "queries": log.count,
+        "budget": budget_case["budget"],
+        "duplicates": log.duplicates(2),
+    }
+
+def check_query_budgets(host="localhost"):
+    # Returns (results, URL names without a declared budget).
+    context = get_budget_context()
+    missing = [name for name in get_url_names() if name not in QUERY_BUDGETS]
+
+    organiser_client = Client(headers={"host": host}, raise_request_exception=False)
+    organiser_client.force_login(context["organiser"])
+    public_client = Client(headers={"host": host}, raise_request_exception=False)
+
+    results = []
+    try:
+        with fake_stripe_backend(STRIPE_WEBHOOK_SECRET=context["webhook_secret"]):
+            for name in get_url_names():
+                for budget_case in QUERY_BUDGETS.get(name, []):
+                    client = organiser_client if budget_case["login"] else public_client
+                    results.append(run_case(client, name, budget_case, context))
+    finally:
+        remove_checkout_bookings()
+        StripeEvent.objects.filter(event_id=BUDGET_EVENT_ID).delete()
+        for holiday in HolidayException.objects.filter(booking_page=context["page"], note="Query budget holiday"):
+            holiday.delete()
+        Court.objects.filter(booking_page__organiser=context["organiser"], name=BUDGET_COURT_NAME).delete()
+        clear_draft(context["organiser"])
+
+    return results, missing
+
+def get_budget_problems(results, missing):
+    problems = [f"{name}: no query budget declared" for name in missing]
+    for result in results:
+        if result["status"] >= 400:
+            problems.append(f"{result['name']} ({result['path']}): status {result['status']}")
+        elif result["queries"] > result["budget"]:
+            repeated = "".join(f"\n    {count}x {sql[:200]}" for sql, count in result["duplicates"][:3])
+            problems.append(f"{result['name']} ({result['path']}): {result['queries']} queries, budget {result['budget']}{repeated}")
+    return problems
+
+def assert_query_budgets(host="localhost"):
+    # For test suites: fails with every overrun at once.
+    results, missing = check_query_budgets(host)
+    problems = get_budget_problems(results, missing)
+    if problems:
+        raise AssertionError("Query budgets exceeded:\n  " + "\n  ".join(problems))
+    return results
@@ -0,0 +1,72 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+import re
+
+# Every database connection sends its queries through record_query (installed
+# by CoreConfig.ready). They are recorded in the QueryLog of the current
+# context, which follows a request into sync_to_async threads, so the async
+# views are measured like the sync ones.
+
+current_log = ContextVar("query_log", default=None)
+
+FINGERPRINT_PATTERNS = [
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s|\?"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+]
+
+def fingerprint(sql):
+    # Queries differing only in their values (the same lookup per row, i.e.
+    # an N+1) share a fingerprint.
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+class QueryLog:
+    def __init__(self, parent=None):
+        # Logs nest: a query is recorded in the current log and all its parents.
+        self.queries = []
+        self.parent = parent
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def duration(self):
+        return sum(seconds for _, seconds in self.queries)
+
+    def duplicates(self, threshold):
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count >= threshold]
+
+def record_query(execute, sql, params, many, context):
+    log = current_log.get()
+    if log is None:
+        return execute(sql, params, many, context)
+
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = perf_counter() - started
+        while log is not None:
+            log.queries.append((sql, elapsed))
+            log = log.parent
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+@contextmanager
+def collect_queries():
+    log = QueryLog(current_log.get())
+    token = current_log.set(log)
+    try:
+        yield log
+    finally:
+        current_log.reset(token)
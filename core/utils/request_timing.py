@@ -0,0 +1,97 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+import sys
+import threading
+
+# Phases are timed where the work happens (session store, template backend,
+# Stripe client) into the RequestTimings of the current context, which follows
+# a request into sync_to_async threads. Outside a request timed() is a no-op.
+
+current_timings = ContextVar("request_timings", default=None)
+
+class RequestTimings:
+    def __init__(self):
+        self.phases = {}
+        self.active = set()
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+@contextmanager
+def timed(phase):
+    timings = current_timings.get()
+    # Nested timings of the same phase (a render inside a render) count once.
+    if timings is None or phase in timings.active:
+        yield
+        return
+
+    timings.active.add(phase)
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.active.discard(phase)
+        timings.add(phase, perf_counter() - started)
+
+@contextmanager
+def collect_timings():
+    timings = RequestTimings()
+    token = current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        current_timings.reset(token)
+
+def format_server_timing(metrics):
+    # metrics: [(name, seconds, description or None)]
+    entries = []
+    for name, seconds, description in metrics:
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if description:
+            entry += f';desc="{description}"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+def frame_label(frame):
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+class StackSampler:
+    # Samples the stacks of the given threads (all threads but its own when
+    # None) every `interval` seconds. collapsed() is the input format of
+    # flamegraph.pl and speedscope: one "root;...;leaf count" line per stack.
+    def __init__(self, interval=0.001, thread_ids=None):
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        return self
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (self.thread_ids is not None and ident not in self.thread_ids):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
@@ -0,0 +1,62 @@
+from core.models import Booking, CourtDailyRollup
+from core.utils.availability import to_minutes
+from decimal import Decimal
+from django.utils import timezone
+
+def refresh_rollups(court_days):
+    court_days = {(court_id, day) for court_id, day in court_days if court_id and day}
+    if not court_days:
+        return
+
+    rollups = {key: CourtDailyRollup(court_id=key[0], date=key[1], revenue=Decimal("0")) for key in court_days}
+    bookings = Booking.objects.filter(
+        court_id__in={court_id for court_id, _ in court_days},
+        date__in={day for _, day in court_days},
+    ).exclude(payment_status="refunded").values_list("court_id", "date", "start_time", "end_time", "payment_status", "amount")
+
+    for court_id, day, start_time, end_time, payment_status, amount in bookings:
+        rollup = rollups.get((court_id, day))
+        if rollup is None:
+            continue
+        rollup.booking_count += 1
+        rollup.booked_minutes += to_minutes(end_time) - to_minutes(start_time)
+        if payment_status == "paid":
+            rollup.paid_count += 1
+            rollup.revenue += amount
+        else:
+            rollup.unpaid_count += 1
+
+    now = timezone.now()
+    for rollup in rollups.values():
+        rollup.updated_at = now
+
+    CourtDailyRollup.objects.bulk_create(
+        rollups.values(),
+        update_conflicts=True,
+        unique_fields=["court", "date"],
+        update_fields=["booking_count", "paid_count", "unpaid_count", "booked_minutes", "revenue", "updated_at"],
+    )
+
+def rebuild_rollups(booking_page_ids=None, since=None, batch_size=1000):
+    bookings = Booking.objects.all()
+    rollups = CourtDailyRollup.objects.all()
+    if booking_page_ids is not None:
+        bookings = bookings.filter(court__booking_page_id__in=booking_page_ids)
+        rollups = rollups.filter(court__booking_page_id__in=booking_page_ids)
+    if since is not None:
+        bookings = bookings.filter(date__gte=since)
+        rollups = rollups.filter(date__gte=since)
+
+    # Existing rollups are included so days whose bookings are all gone are zeroed.
+    court_days = bookings.order_by().values_list("court_id", "date").union(rollups.order_by().values_list("court_id", "date")).order_by("court_id", "date")
+    batch = []
+    rebuilt = 0
+    for key in court_days.iterator(chunk_size=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            refresh_rollups(batch)
+            rebuilt += len(batch)
+            batch = []
+    refresh_rollups(batch)
+
+    return rebuilt + len(batch)
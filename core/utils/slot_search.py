@@ -0,0 +1,62 @@
+from core.utils.availability import daterange, format_minutes, load_availability, to_minutes, window_mask
+from datetime import timedelta
+from django.utils import timezone
+
+# Availability is loaded a week at a time and scanned day by day, so a search
+# that is satisfied early never touches the rest of the horizon.
+
+SEARCH_CHUNK_DAYS = 7
+
+def run_starts(free_mask, length):
+    # Bits where `length` consecutive free slots begin.
+    starts = free_mask
+    for offset in range(1, length):
+        starts &= free_mask >> offset
+    return starts
+
+def find_next_slots(booking_page, start_date, duration, count=5, earliest=None, latest=None, horizon_days=28, now=None):
+    now = timezone.localtime(now or timezone.now())
+    end_date = start_date + timedelta(days=horizon_days - 1)
+    earliest_minutes = to_minutes(earliest) if earliest else 0
+    latest_minutes = to_minutes(latest) if latest else 24 * 60
+
+    results = []
+    chunk_start = start_date
+    while chunk_start <= end_date and len(results) < count:
+        chunk_end = min(end_date, chunk_start + timedelta(days=SEARCH_CHUNK_DAYS - 1))
+        availability = load_availability([booking_page.id], chunk_start, chunk_end).get(booking_page.id)
+        if not availability or duration % availability.slot_size:
+            return []
+
+        slot_size = availability.slot_size
+        length = duration // slot_size
+        start_mask = window_mask(earliest_minutes, latest_minutes - duration + slot_size, slot_size)
+        if not start_mask:
+            # The run cannot fit between earliest and latest on any day.
+            return []
+
+        for day in daterange(chunk_start, chunk_end):
+            day_mask = start_mask
+            if day == now.date():
+                day_mask &= window_mask(to_minutes(now), 24 * 60, slot_size)
+            elif day < now.date():
+                continue
+            if not day_mask:
+                continue
+
+            matches = []
+            for court in availability.courts:
+                starts = run_starts(availability.free_mask(court.id, day), length) & day_mask
+                while starts:
+                    low = starts & -starts
+                    matches.append(((low.bit_length() - 1) * slot_size, court))
+                    starts ^= low
+
+            for start, court in sorted(matches, key=lambda match: (match[0], match[1].name)):
+                results.append({"date": day, "start": format_minutes(start), "end": format_minutes(start + duration), "court": court})
+                if len(results) == count:
+                    return results
+
+        chunk_start = chunk_end + timedelta(days=1)
+
+    return results
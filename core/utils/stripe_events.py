@@ -0,0 +1,70 @@
+from core.models import Booking, StripeEvent
+from core.utils.occupancy import refresh_occupancy
+from core.utils.rollups import refresh_rollups
+from django.db import transaction
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+PAID_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+EXPIRED_EVENTS = {"checkout.session.expired", "checkout.session.async_payment_failed"}
+
+def store_event(event):
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event["id"], type=event["type"], account=event.get("account") or "", payload=event)],
+        ignore_conflicts=True,
+    )
+
+def get_booking_id(event):
+    session = event.payload.get("data", {}).get("object", {})
+    booking_id = session.get("client_reference_id") or session.get("metadata", {}).get("booking_id")
+    if event.type in PAID_EVENTS and session.get("payment_status") not in ("paid", "no_payment_required"):
+        return None
+    return int(booking_id) if booking_id and str(booking_id).isdigit() else None
+
+def process_events(batch_size=500):
+    with transaction.atomic():
+        events = list(
+            StripeEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(processed_at__isnull=True)
+            .order_by("received_at")[:batch_size]
+        )
+        if not events:
+            return 0
+
+        paid_ids = set()
+        expired_ids = set()
+        for event in events:
+            booking_id = get_booking_id(event)
+            if booking_id is None:
+                continue
+            if event.type in PAID_EVENTS:
+                paid_ids.add(booking_id)
+            elif event.type in EXPIRED_EVENTS:
+                expired_ids.add(booking_id)
+        expired_ids -= paid_ids
+
+        court_days = set()
+
+        bookings = list(Booking.objects.filter(id__in=paid_ids, payment_status="unpaid"))
+        for booking in bookings:
+            booking.payment_status = "paid"
+            booking.hold_expires_at = None
+            court_days.add((booking.court_id, booking.date))
+        Booking.objects.bulk_update(bookings, ["payment_status", "hold_expires_at"])
+
+        missing_ids = paid_ids - {booking.id for booking in bookings} - set(Booking.objects.filter(id__in=paid_ids, payment_status="paid").values_list("id", flat=True))
+        for booking_id in sorted(missing_ids):
+            logger.warning("Payment completed for booking %s, which no longer holds its slot; refund required.", booking_id)
+
+        expired = Booking.objects.filter(id__in=expired_ids, payment_status="unpaid")
+        court_days.update(expired.values_list("court_id", "date"))
+        expired.delete()
+
+        refresh_occupancy(court_days)
+        refresh_rollups(court_days)
+        StripeEvent.objects.filter(id__in=[event.id for event in events]).update(processed_at=timezone.now())
+
+    return len(events)
@@ -0,0 +1,146 @@
+from contextlib import contextmanager
+from core.utils.request_timing import timed
+from django.conf import settings
+from operator import attrgetter
+from time import monotonic
+import asyncio
+import httpx
+import stripe
+import threading
+import weakref
+
+# Every Stripe API call goes through here. Connections are pooled and kept
+# alive: httpx's async pool is bound to its event loop, so async calls share
+# one client per running loop (one per ASGI worker), sync calls one client per
+# process. Calls time out after STRIPE_TIMEOUT_SECONDS, are retried
+# STRIPE_MAX_NETWORK_RETRIES times under the same idempotency key, and fail
+# fast while the circuit breaker is open.
+
+async_clients = weakref.WeakKeyDictionary()
+sync_client = None
+sync_client_lock = threading.Lock()
+closing_tasks = set()
+
+class StripeUnavailable(stripe.APIConnectionError):
+    pass
+
+# Errors that mean Stripe is struggling, as opposed to rejecting a request.
+OUTAGE_ERRORS = (stripe.APIConnectionError, stripe.APIError, stripe.RateLimitError)
+
+class CircuitBreaker:
+    # Opens after STRIPE_BREAKER_FAILURES consecutive outage errors. While open
+    # calls raise StripeUnavailable without touching the network; after
+    # STRIPE_BREAKER_RESET_SECONDS a single trial call decides whether it
+    # closes again. State is per process.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None and (self.trial or monotonic() - self.opened_at < settings.STRIPE_BREAKER_RESET_SECONDS)
+
+    def acquire(self):
+        with self.lock:
+            if self.is_open:
+                raise StripeUnavailable("Stripe is unavailable; not calling it until the circuit breaker resets.")
+            if self.opened_at is not None:
+                self.trial = True
+
+    def release(self, healthy):
+        # healthy is None when the call was cancelled before Stripe answered.
+        with self.lock:
+            self.trial = False
+            if healthy:
+                self.failures = 0
+                self.opened_at = None
+            elif healthy is False:
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= settings.STRIPE_BREAKER_FAILURES:
+                    self.opened_at = monotonic()
+
+    @contextmanager
+    def guard(self):
+        self.acquire()
+        healthy = None
+        try:
+            yield
+            healthy = True
+        except OUTAGE_ERRORS:
+            healthy = False
+            raise
+        except stripe.StripeError:
+            healthy = True
+            raise
+        finally:
+            self.release(healthy)
+
+breaker = CircuitBreaker()
+
+def is_available():
+    return not breaker.is_open
+
+def get_timeout():
+    return httpx.Timeout(settings.STRIPE_TIMEOUT_SECONDS, connect=settings.STRIPE_CONNECT_TIMEOUT_SECONDS)
+
+def close_later(client):
+    # Keeps a reference until the close has run; the loop only holds a weak one.
+    task = asyncio.get_running_loop().create_task(client.close_async())
+    closing_tasks.add(task)
+    task.add_done_callback(closing_tasks.discard)
+
+def get_http_client(asynchronous):
+    # Clients are rebuilt when the timeouts change (override_settings), and
+    # the replaced ones closed.
+    global sync_client
+    timeout = get_timeout()
+    if asynchronous:
+        loop = asyncio.get_running_loop()
+        replaced = async_clients.get(loop)
+        if replaced is None or replaced[0] != timeout:
+            async_clients[loop] = (timeout, stripe.HTTPXClient(timeout=timeout))
+            if replaced is not None:
+                close_later(replaced[1])
+        return async_clients[loop][1]
+
+    with sync_client_lock:
+        replaced = sync_client
+        if replaced is None or replaced[0] != timeout:
+            sync_client = (timeout, stripe.HTTPXClient(timeout=timeout, allow_sync_methods=True))
+            if replaced is not None:
+                replaced[1].close()
+        return sync_client[1]
+
+def get_service(path, asynchronous=False):
+    # e.g. get_service("checkout.sessions")
+    client = stripe.StripeClient(
+        settings.STRIPE_SECRET_KEY,
+        http_client=get_http_client(asynchronous),
+        base_addresses={"api": settings.STRIPE_API_BASE} if settings.STRIPE_API_BASE else {},
+        max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+    )
+    return attrgetter(path)(client)
+
+def get_options(idempotency_key, stripe_account):
+    options = {}
+    if idempotency_key:
+        options["idempotency_key"] = idempotency_key
+    if stripe_account:
+        options["stripe_account"] = stripe_account
+    return options
+
+def call(path, method, params=None, idempotency_key=None, stripe_account=None):
+    # call("checkout.sessions", "create", {...}, idempotency_key=...)
+    service = get_service(path)
+    with breaker.guard(), timed("stripe"):
+        return getattr(service, method)(params=params or {}, options=get_options(idempotency_key, stripe_account))
+
+async def call_async(path, method, params=None, idempotency_key=None, stripe_account=None):
+    service = get_service(path, asynchronous=True)
+    with breaker.guard(), timed("stripe"):
+        return await getattr(service, f"{method}_async")(params=params or {}, options=get_options(idempotency_key, stripe_account))
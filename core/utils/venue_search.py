@@ -0,0 +1,71 @@
+from core.models import BookingPage, BookingPageLocality
+from core.utils.availability import load_availability
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.db.models import Count
+import re
+import unicodedata
+
+# BookingPage.location is free text, so venues are found through normalized
+# location words ("Saint-Kilda, VIC" -> "saint", "kilda", "vic") stored in an
+# indexed BookingPageLocality table. A search matches pages having every
+# word of the query and only those candidates are checked for availability,
+# a batch at a time until enough of them are free.
+
+VENUE_SEARCH_CANDIDATE_BATCH = 200
+
+def location_terms(location):
+    text = unicodedata.normalize("NFKD", location or "").encode("ascii", "ignore").decode().lower()
+    return sorted({term[:100] for term in re.split(r"[^a-z0-9]+", text) if len(term) >= 2})
+
+def refresh_localities(booking_pages):
+    booking_pages = list(booking_pages)
+    with transaction.atomic():
+        BookingPageLocality.objects.filter(booking_page__in=booking_pages).delete()
+        BookingPageLocality.objects.bulk_create(
+            [
+                BookingPageLocality(booking_page=booking_page, term=term)
+                for booking_page in booking_pages
+                for term in location_terms(booking_page.location)
+            ],
+            batch_size=1000,
+        )
+
+def find_candidate_pages(location):
+    terms = location_terms(location)
+    if not terms:
+        return BookingPage.objects.none()
+
+    matching = (
+        BookingPageLocality.objects
+        .filter(term__in=terms)
+        .values("booking_page_id")
+        .annotate(matches=Count("term"))
+        .filter(matches=len(terms))
+        .values("booking_page_id")
+    )
+    return BookingPage.objects.filter(id__in=matching, is_active=True).order_by("name", "id")
+
+def search_venues(location, day, start_time, duration, limit=50):
+    end_time = (datetime.combine(day, start_time) + timedelta(minutes=duration)).time()
+    if end_time <= start_time:
+        return []
+
+    candidates = find_candidate_pages(location)
+    results = []
+    offset = 0
+    while True:
+        booking_pages = list(candidates[offset:offset + VENUE_SEARCH_CANDIDATE_BATCH])
+        availabilities = load_availability([booking_page.id for booking_page in booking_pages], day, day) if booking_pages else {}
+        for booking_page in booking_pages:
+            availability = availabilities.get(booking_page.id)
+            if not availability:
+                continue
+            free_courts = [court for court in availability.courts if availability.is_free(court.id, day, start_time, end_time)]
+            if free_courts:
+                results.append({"booking_page": booking_page, "courts": free_courts})
+                if len(results) == limit:
+                    return results
+        if len(booking_pages) < VENUE_SEARCH_CANDIDATE_BATCH:
+            return results
+        offset += VENUE_SEARCH_CANDIDATE_BATCH
@@ -0,0 +1,136 @@
+from core.models import WizardDraft, WizardDraftItem
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Drafts live in the database: wizard steps in WizardDraft.data, and each
+# court, equipment option or exception added to a list section in its own
+# WizardDraftItem row, so adding or removing one inserts or deletes one small
+# row instead of rewriting the draft. Every change holds the WizardDraft row
+# lock, so concurrent edits never lose each other. With a shared cache
+# (WIZARD_DRAFT_CACHE) reads are served from the cache, which is written while
+# the lock is held; a per-process cache would go stale across workers, so
+# without one reads go to the tables.
+
+STEP_KEYS = [
+    "name",
+    "location",
+    "slot_definition",
+    "opening_hour_rules",
+]
+ITEM_SECTIONS = [
+    "courts",
+    "equipment_options",
+    "holiday_exceptions",
+    "special_exceptions",
+]
+
+def get_ttl():
+    return timedelta(hours=settings.WIZARD_DRAFT_TTL_HOURS)
+
+def cache_key(organiser):
+    return f"wizard-draft:{organiser.id}"
+
+def to_json(value):
+    # Cached values round-trip through JSON so they match what the checkpoint returns.
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+def get_items(checkpoint):
+    return list(checkpoint.items.values_list("id", "section", "data"))
+
+def assemble(checkpoint, items):
+    draft = dict(checkpoint.data)
+    for _, section, data in items:
+        draft.setdefault(section, []).append(data)
+    return draft
+
+def load_checkpoint(organiser):
+    checkpoint = WizardDraft.objects.filter(organiser=organiser, expires_at__gt=timezone.now()).first()
+    return assemble(checkpoint, get_items(checkpoint)) if checkpoint else {}
+
+def set_cached(organiser, draft):
+    try:
+        cache.set(cache_key(organiser), draft, timeout=get_ttl().total_seconds())
+        return True
+    except Exception:
+        logger.warning("Wizard draft cache unavailable", exc_info=True)
+        return False
+
+def get_draft(organiser):
+    if not settings.WIZARD_DRAFT_CACHE:
+        return load_checkpoint(organiser)
+
+    try:
+        draft = cache.get(cache_key(organiser))
+    except Exception:
+        logger.warning("Wizard draft cache unavailable, reading checkpoint", exc_info=True)
+        return load_checkpoint(organiser)
+
+    if draft is None:
+        draft = load_checkpoint(organiser)
+        set_cached(organiser, draft)
+    return draft
+
+def lock_checkpoint(organiser):
+    # Must run in a transaction. Returns the draft and its items; an expired
+    # draft starts over.
+    now = timezone.now()
+    checkpoint, created = WizardDraft.objects.select_for_update().get_or_create(organiser=organiser, defaults={"expires_at": now + get_ttl()})
+    if created:
+        return checkpoint, []
+    if checkpoint.expires_at <= now:
+        checkpoint.items.all().delete()
+        checkpoint.data = {}
+        checkpoint.expires_at = now + get_ttl()
+        checkpoint.save(update_fields=["data", "expires_at", "updated_at"])
+        return checkpoint, []
+    return checkpoint, get_items(checkpoint)
+
+def store_cached(organiser, checkpoint, items):
+    draft = assemble(checkpoint, items)
+    if settings.WIZARD_DRAFT_CACHE:
+        set_cached(organiser, draft)
+    return draft
+
+def update_draft(organiser, values):
+    # A wizard step: store the changed step sections and renew the draft.
+    values = to_json({key: value for key, value in values.items() if key in STEP_KEYS})
+    with transaction.atomic():
+        checkpoint, items = lock_checkpoint(organiser)
+        checkpoint.data = {**checkpoint.data, **values}
+        checkpoint.expires_at = timezone.now() + get_ttl()
+        checkpoint.save(update_fields=["data", "expires_at", "updated_at"])
+        return store_cached(organiser, checkpoint, items)
+
+def append_draft_item(organiser, section, item):
+    with transaction.atomic():
+        checkpoint, items = lock_checkpoint(organiser)
+        item = WizardDraftItem.objects.create(draft=checkpoint, section=section, data=to_json(item))
+        return store_cached(organiser, checkpoint, [*items, (item.id, item.section, item.data)])
+
+def remove_draft_item(organiser, section, index):
+    with transaction.atomic():
+        checkpoint, items = lock_checkpoint(organiser)
+        section_ids = [item_id for item_id, item_section, _ in items if item_section == section]
+        if 0 <= index < len(section_ids):
+            WizardDraftItem.objects.filter(id=section_ids[index]).delete()
+            items = [item for item in items if item[0] != section_ids[index]]
+        return store_cached(organiser, checkpoint, items)
+
+def clear_draft(organiser):
+    try:
+        cache.delete(cache_key(organiser))
+    except Exception:
+        logger.warning("Wizard draft cache unavailable", exc_info=True)
+    WizardDraft.objects.filter(organiser=organiser).delete()
+
+def purge_expired_drafts(now=None):
+    _, deleted = WizardDraft.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted.get(WizardDraft._meta.label, 0)
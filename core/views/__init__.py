@@ -2,4 +2,5 @@ from .account import *
 from .booking_page import *
 from .booking_page_admin import *
 from .booking_page_setting import *
-from .dashboard import *
\ No newline at end of file
+from .dashboard import *
+from .stripe_webhook import *
\ No newline at end of file
@@ -0,0 +1,244 @@
+from asgiref.sync import sync_to_async
+from core.forms import BookingForm
+from core.db_router import replica_reads
+from core.models import BookingPage
+from core.utils import stripe_gateway
+from core.utils.availability import daterange, format_minutes, get_availability_etag, get_page_availability, load_availability
+from core.utils.bookings import SlotTaken, create_booking
+from core.utils.payments import create_checkout_session
+from core.utils.slot_search import find_next_slots
+from core.utils.venue_search import search_venues
+from datetime import timedelta
+from django.conf import settings
+from django.contrib import messages
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_time
+import stripe
+
+async def get_public_booking_page(request, public_url):
+    booking_page = await BookingPage.objects.select_related("slot_definition", "organiser").filter(public_url=public_url).afirst()
+    if not booking_page:
+        raise Http404("Booking page not found")
+    if not booking_page.is_active and booking_page.organiser_id != (await request.auser()).id:
+        raise Http404("Booking page not found")
+    return booking_page
+
+def get_context_booking_page(booking_page, day, form=None):
+    availability = get_page_availability(booking_page, day, day)
+    if not availability:
+        raise Http404("Booking page is not set up yet")
+
+    return {
+        "booking_page": booking_page,
+        "day": day,
+        "previous_day": day - timedelta(days=1),
+        "next_day": day + timedelta(days=1),
+        "courts": availability.courts,
+        "grid": availability.grid(day),
+        "form": form or BookingForm(courts=availability.courts, initial={"date": day}),
+    }
+
+@sync_to_async
+def render_booking_page(request, booking_page, day, form=None, status=200):
+    # Loading the grid and rendering (user, messages) stay synchronous and
+    # run together in one worker thread.
+    return render(request, "booking_page/public.html", get_context_booking_page(booking_page, day, form), status=status)
+
+@replica_reads
+async def booking_page_view(request, public_url):
+    booking_page = await get_public_booking_page(request, public_url)
+
+    try:
+        day = parse_date(request.GET.get("date", "")) or timezone.localdate()
+    except ValueError:
+        day = timezone.localdate()
+
+    return await render_booking_page(request, booking_page, day)
+
+async def book_slot(request, public_url):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid request method")
+
+    booking_page = await get_public_booking_page(request, public_url)
+    courts = [court async for court in booking_page.courts.all()]
+
+    form = BookingForm(request.POST, courts=courts)
+    if not form.is_valid():
+        day = form.cleaned_data.get("date") or timezone.localdate()
+        return await render_booking_page(request, booking_page, day, form, status=400)
+
+    data = form.cleaned_data
+    # Don't hold a slot for a checkout that cannot start.
+    if not stripe_gateway.is_available():
+        messages.error(request, "Payments are temporarily unavailable. Please try again in a few minutes.")
+        return await render_booking_page(request, booking_page, data["date"], form, status=503)
+
+    court = next(court for court in courts if str(court.id) == data["court"])
+    court.booking_page = booking_page
+
+    try:
+        booking = await sync_to_async(create_booking)(
+            court,
+            data["date"],
+            data["start_time"],
+            data["end_time"],
+            hold_for=timedelta(minutes=settings.SLOT_HOLD_MINUTES),
+            player_email=data["player_email"],
+            player_phone=data["player_phone"],
+        )
+    except SlotTaken as e:
+        messages.error(request, str(e))
+        return await render_booking_page(request, booking_page, data["date"], form, status=409)
+
+    page_url = request.build_absolute_uri(f"{reverse('booking_page', args=[public_url])}?date={data['date']:%Y-%m-%d}")
+    try:
+        session = await create_checkout_session(booking, success_url=f"{page_url}&checkout=success", cancel_url=page_url)
+    except stripe.StripeError:
+        await booking.adelete()
+        messages.error(request, "We could not start the payment. Please try again.")
+        return await render_booking_page(request, booking_page, data["date"], form, status=502)
+
+    return redirect(session.url)
+
+
+def get_availability_range(request):
+    try:
+        start_date = parse_date(request.GET.get("start", "")) or timezone.localdate()
+        end_date = parse_date(request.GET.get("end", "")) or start_date
+    except ValueError:
+        return None
+    if end_date < start_date or (end_date - start_date).days >= settings.AVAILABILITY_MAX_DAYS:
+        return None
+    return start_date, end_date
+
+@replica_reads
+async def availability_api(request, public_url):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseBadRequest("Invalid request method")
+
+    date_range = get_availability_range(request)
+    if not date_range:
+        return HttpResponseBadRequest(f"Invalid date range (at most {settings.AVAILABILITY_MAX_DAYS} days)")
+    start_date, end_date = date_range
+
+    booking_page = await BookingPage.objects.filter(public_url=public_url, is_active=True).values("id", "version").afirst()
+    if not booking_page:
+        raise Http404("Booking page not found")
+
+    etag = await get_availability_etag(booking_page["id"], booking_page["version"], start_date, end_date)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        availabilities = await sync_to_async(load_availability)([booking_page["id"]], start_date, end_date)
+        availability = availabilities.get(booking_page["id"])
+        if not availability:
+            raise Http404("Booking page is not set up yet")
+
+        response = JsonResponse({
+            "booking_page": public_url,
+            "slot_size": availability.slot_size,
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "days": [
+                {
+                    "date": day.isoformat(),
+                    "courts": [
+                        {
+                            "id": court.id,
+                            "name": court.name,
+                            "free": [format_minutes(start) for start in availability.free_slots(court.id, day)],
+                        }
+                        for court in availability.courts
+                    ],
+                }
+                for day in daterange(start_date, end_date)
+            ],
+        })
+
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=settings.AVAILABILITY_CACHE_SECONDS)
+    return response
+
+def get_slot_search(request):
+    try:
+        search = {
+            "start_date": parse_date(request.GET.get("start", "")) or timezone.localdate(),
+            "duration": int(request.GET.get("duration", "60")),
+            "count": int(request.GET.get("count", "5")),
+            "earliest": parse_time(request.GET.get("from", "")),
+            "latest": parse_time(request.GET.get("to", "")),
+            "horizon_days": int(request.GET.get("days", "28")),
+        }
+    except ValueError:
+        return None
+
+    if not 0 < search["duration"] <= 24 * 60 or not 0 < search["count"] <= settings.SLOT_SEARCH_MAX_RESULTS:
+        return None
+    if not 0 < search["horizon_days"] <= settings.SLOT_SEARCH_MAX_DAYS:
+        return None
+    return search
+
+@replica_reads
+def next_slots_api(request, public_url):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseBadRequest("Invalid request method")
+
+    search = get_slot_search(request)
+    if not search:
+        return HttpResponseBadRequest("Invalid search")
+
+    booking_page = BookingPage.objects.filter(public_url=public_url, is_active=True, slot_definition__isnull=False).select_related("slot_definition").first()
+    if not booking_page:
+        raise Http404("Booking page not found")
+    if search["duration"] % booking_page.slot_definition.slot_size:
+        return HttpResponseBadRequest(f"Duration must be a multiple of {booking_page.slot_definition.slot_size} minutes")
+
+    slots = find_next_slots(booking_page, **search)
+    response = JsonResponse({
+        "booking_page": public_url,
+        "duration": search["duration"],
+        "slots": [
+            {"date": slot["date"].isoformat(), "start": slot["start"], "end": slot["end"], "court": {"id": slot["court"].id, "name": slot["court"].name}}
+            for slot in slots
+        ],
+    })
+    patch_cache_control(response, public=True, max_age=settings.AVAILABILITY_CACHE_SECONDS)
+    return response
+
+@replica_reads
+def venue_search_api(request):
+    if request.method not in ("GET", "HEAD"):
+        return HttpResponseBadRequest("Invalid request method")
+
+    location = request.GET.get("location", "").strip()
+    try:
+        day = parse_date(request.GET.get("date", "")) or timezone.localdate()
+        start_time = parse_time(request.GET.get("start", ""))
+        duration = int(request.GET.get("duration", "60"))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid search")
+    if not location or not start_time or not 0 < duration <= 24 * 60:
+        return HttpResponseBadRequest("Invalid search")
+
+    venues = search_venues(location, day, start_time, duration, limit=settings.VENUE_SEARCH_MAX_RESULTS)
+    response = JsonResponse({
+        "location": location,
+        "date": day.isoformat(),
+        "start": start_time.strftime("%H:%M"),
+        "duration": duration,
+        "venues": [
+            {
+                "name": venue["booking_page"].name,
+                "location": venue["booking_page"].location,
+                "public_url": venue["booking_page"].public_url,
+                "url": venue["booking_page"].get_public_url,
+                "courts": [{"id": court.id, "name": court.name} for court in venue["courts"]],
+            }
+            for venue in venues
+        ],
+    })
+    patch_cache_control(response, public=True, max_age=settings.AVAILABILITY_CACHE_SECONDS)
+    return response
\ No newline at end of file
@@ -0,0 +1,94 @@
+from core.db_router import replica_reads
+from core.models import Booking, BookingPage, CourtDailyRollup
+from core.utils.availability import daterange, to_minutes
+from core.utils.booking_export import stream_csv, stream_ics
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.decorators import login_required
+from django.db import router
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404
+from django.utils import timezone
+
+def get_occupancy_rate(booked_minutes, open_minutes):
+    return round(booked_minutes * 100 / open_minutes) if open_minutes else 0
+
+def get_context_monitor(booking_page, today):
+    week_start = today - timedelta(days=today.weekday())
+    week_end = week_start + timedelta(days=6)
+
+    courts = list(booking_page.courts.all())
+    open_minutes = {
+        rule.weekday: to_minutes(rule.end_time) - to_minutes(rule.start_time)
+        for rule in booking_page.opening_hour_rules.all()
+    }
+    today_open_minutes = open_minutes.get(today.weekday(), 0)
+    week_open_minutes = sum(open_minutes.get(day.weekday(), 0) for day in daterange(week_start, week_end))
+
+    rows = {
+        court.id: {
+            "court": court,
+            "today": {"booked_minutes": 0, "paid_count": 0, "unpaid_count": 0, "revenue": Decimal("0")},
+            "week": {"booked_minutes": 0, "paid_count": 0, "unpaid_count": 0, "revenue": Decimal("0")},
+        }
+        for court in courts
+    }
+    totals = {
+        "today": {"booked_minutes": 0, "paid_count": 0, "unpaid_count": 0, "revenue": Decimal("0")},
+        "week": {"booked_minutes": 0, "paid_count": 0, "unpaid_count": 0, "revenue": Decimal("0")},
+    }
+
+    rollups = CourtDailyRollup.objects.filter(court__booking_page=booking_page, date__range=(week_start, week_end))
+    for rollup in rollups:
+        if rollup.court_id not in rows:
+            continue
+        periods = ["week", "today"] if rollup.date == today else ["week"]
+        for period in periods:
+            for summary in (rows[rollup.court_id][period], totals[period]):
+                summary["booked_minutes"] += rollup.booked_minutes
+                summary["paid_count"] += rollup.paid_count
+                summary["unpaid_count"] += rollup.unpaid_count
+                summary["revenue"] += rollup.revenue
+
+    for row in rows.values():
+        row["today"]["occupancy"] = get_occupancy_rate(row["today"]["booked_minutes"], today_open_minutes)
+        row["week"]["occupancy"] = get_occupancy_rate(row["week"]["booked_minutes"], week_open_minutes)
+    totals["today"]["occupancy"] = get_occupancy_rate(totals["today"]["booked_minutes"], today_open_minutes * len(courts))
+    totals["week"]["occupancy"] = get_occupancy_rate(totals["week"]["booked_minutes"], week_open_minutes * len(courts))
+
+    return {
+        "booking_page": booking_page,
+        "today": today,
+        "week_start": week_start,
+        "week_end": week_end,
+        "rows": rows.values(),
+        "totals": totals,
+    }
+
+@login_required
+@replica_reads
+def monitor_view(request, booking_page_id):
+    booking_page = get_object_or_404(BookingPage, id=booking_page_id, organiser=request.user)
+    context = get_context_monitor(booking_page, timezone.localdate())
+
+    if request.headers.get("HX-Request"):
+        return render(request, "monitor/partials/_summary.html", context)
+    return render(request, "monitor/index.html", context)
+
+
+@login_required
+@replica_reads
+def export_bookings(request, booking_page_id, file_format):
+    booking_page = get_object_or_404(BookingPage, id=booking_page_id, organiser=request.user)
+
+    # The stream is consumed after the view returns, so pick the database now.
+    using = router.db_for_read(Booking)
+    if file_format == "csv":
+        response = StreamingHttpResponse(stream_csv(booking_page, using=using), content_type="text/csv; charset=utf-8")
+    elif file_format == "ics":
+        response = StreamingHttpResponse(stream_ics(booking_page, request.get_host(), using=using), content_type="text/calendar; charset=utf-8")
+    else:
+        raise Http404("Unknown export format")
+
+    response["Content-Disposition"] = f'attachment; filename="bookings-{booking_page.public_url}.{file_format}"'
+    return response
\ No newline at end of file
@@ -1,21 +1,63 @@
 from core.forms import BookingPageForm, CourtForm, SlotDefinitionForm, EquipmentOptionForm, OpeningHourRuleFormSet, HolidayExceptionForm, SpecialExceptionForm
-from core.models import BookingPage, Court, SlotDefinition, EquipmentOption, OpeningHourRule, HolidayException, SpecialException
+from core.models import BookingPage, OpeningHourRule, SpecialException
+from core.utils.booking_page_import import create_booking_page, generate_public_urls, import_booking_pages, parse_booking_pages
+from core.utils.fragment_cache import LIST_SECTIONS, get_fragment, get_fragment_key, set_fragment
+from core.utils.holiday_import import import_holidays
+from core.utils.intervals import find_exception_clashes
 from core.utils.setting_config import SETTING_CONFIG
+from core.utils.wizard_drafts import append_draft_item, clear_draft, get_draft, remove_draft_item, update_draft
+from datetime import timedelta
 from decimal import Decimal
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
-from django.http import HttpResponseBadRequest
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render, redirect, get_object_or_404
-import secrets
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+import json
+
+CLASH_WINDOW_DAYS = 90
+
+SECTION_PREFETCHES = {
+    "courts": ["courts"],
+    "equipment_options": ["equipment_options"],
+    "opening_hour_rules": ["opening_hour_rules"],
+    "holiday_exceptions": ["courts", "holiday_exceptions"],
+    "special_exceptions": ["courts", Prefetch("courts__special_exceptions", queryset=SpecialException.objects.order_by("date", "start_time"))],
+}
+
+def load_booking_page(request, booking_page_id, *sections):
+    prefetches = {}
+    for section in sections:
+        for lookup in SECTION_PREFETCHES.get(section, []):
+            prefetches[getattr(lookup, "prefetch_to", lookup)] = lookup
+
+    queryset = BookingPage.objects.select_related("slot_definition").prefetch_related(*prefetches.values())
+    return get_object_or_404(queryset, id=booking_page_id, organiser=request.user)
+
+def render_list_fragment(request, booking_page, section):
+    # booking_page.version must reflect any write made earlier in the request
+    # (refresh_from_db(fields=["version"]) after a write).
+    key = get_fragment_key(booking_page, section, CLASH_WINDOW_DAYS)
+    html = get_fragment(key)
+    if html is None:
+        booking_page = load_booking_page(request, booking_page.id, section)
+        html = render_to_string(SETTING_CONFIG[section]["template"], {
+            "mode": "edit",
+            "section": section,
+            "booking_page": booking_page,
+            **get_context_setting("edit", booking_page, section),
+        }, request)
+        set_fragment(key, html)
+    return mark_safe(html)
 
 @login_required
 def launch_setting(request, mode, booking_page_id=None):
-    if mode == "create":        
-        setting = request.session.get("setting", {}) or {}
-        request.session["setting"] = setting
-        source = setting
+    if mode == "create":
+        source = get_draft(request.user)
     else:
-        booking_page = get_object_or_404(BookingPage, id=booking_page_id)
+        booking_page = load_booking_page(request, booking_page_id)
         source = booking_page
 
     section = "booking_page"
@@ -39,25 +81,29 @@ def navigate_setting(request, mode, direction=None, section=None, booking_page_i
         if not section:
             return HttpResponseBadRequest("Invalid section or direction")
         
-        setting = request.session.get("setting", {}) or {}
-        source = setting
+        source = get_draft(request.user)
 
         if request.method == "POST":
-            source = save_setting(request, mode, source, current_section)
-            request.session["setting"] = source
+            source = update_draft(request.user, save_setting(request, mode, source, current_section))
 
             if section == "save":
                 create_settings(request, source)
                 return redirect("dashboard")
     else:
-        booking_page = get_object_or_404(BookingPage, id=booking_page_id)
+        if section in LIST_SECTIONS:
+            booking_page = load_booking_page(request, booking_page_id)
+        else:
+            booking_page = load_booking_page(request, booking_page_id, section)
         source = booking_page
 
     context = {
         "mode": mode,
         "section": section
     }
-    context.update(get_context_setting(mode, source, section))
+    if mode == "edit" and section in LIST_SECTIONS:
+        context["list_html"] = render_list_fragment(request, booking_page, section)
+    else:
+        context.update(get_context_setting(mode, source, section))
     context.update(get_context_form(mode, source, section))
     if mode == "edit":
         context["booking_page"] = booking_page
@@ -102,13 +148,13 @@ def get_context_setting(mode, source, section=None):
 
         elif section == "holiday_exceptions":
             holiday_exceptions = source.holiday_exceptions.all()
+            mark_clashes(source.courts.all(), holiday_exceptions=holiday_exceptions)
             context["setting"] = {"holiday_exceptions": holiday_exceptions}
 
         elif section == "special_exceptions":
             courts = source.courts.all()
-            special_exceptions = []
-            for court in courts:
-                special_exceptions.extend(court.special_exceptions.all())
+            special_exceptions = [special_exception for court in courts for special_exception in court.special_exceptions.all()]
+            mark_clashes(courts, special_exceptions=special_exceptions)
             context["setting"] = {
                 "courts": courts,
                 "special_exceptions": special_exceptions
@@ -116,6 +162,12 @@ def get_context_setting(mode, source, section=None):
     
     return context
 
+def mark_clashes(courts, holiday_exceptions=(), special_exceptions=()):
+    today = timezone.localdate()
+    clashes = find_exception_clashes(courts, holiday_exceptions, special_exceptions, today, today + timedelta(days=CLASH_WINDOW_DAYS))
+    for exception in [*holiday_exceptions, *special_exceptions]:
+        exception.clash_count = len(clashes.get(exception, []))
+
 def get_context_form(mode, source, section):
     context = {}
 
@@ -185,10 +237,11 @@ def save_setting_edit(request, booking_page_id, section):
     if request.method != "POST":
         return HttpResponseBadRequest("Invalid request method")
     
-    booking_page = get_object_or_404(BookingPage, id=booking_page_id)
-    source = booking_page
+    booking_page = load_booking_page(request, booking_page_id)
+    save_setting(request, "edit", booking_page, section)
 
-    save_setting(request, "edit", source, section)
+    booking_page = load_booking_page(request, booking_page_id, section)
+    source = booking_page
 
     context = {
         "mode": "edit",
@@ -271,47 +324,9 @@ def create_settings(request, source):
     if not name or not location or not courts or not slot_definition or not opening_hour_rules:
         raise ValueError("Missing required fields for saving booking page")
 
-    public_url = secrets.token_urlsafe(8)
-    while BookingPage.objects.filter(public_url=public_url).exists():
-        public_url = secrets.token_urlsafe(8)
-
-    with transaction.atomic():
-        booking_page = BookingPage.objects.create(
-            organiser=request.user,
-            name=name,
-            location=location,
-            public_url=public_url,
-            is_active=False
-        )
-
-        for court in courts:
-            Court.objects.create(
-                booking_page=booking_page,
-                name=court["name"]
-            )
-
-        SlotDefinition.objects.create(
-            booking_page=booking_page,
-            slot_size=slot_definition["slot_size"],
-            price=slot_definition["price"]
-        )
-
-        for option in equipment_options:
-            EquipmentOption.objects.create(
-                booking_page=booking_page,
-                name=option["name"],
-                price=option["price"]
-            )
-
-        for rule in opening_hour_rules:
-            OpeningHourRule.objects.create(
-                booking_page=booking_page,
-                weekday=rule["weekday"],
-                start_time=rule["start_time"],
-                end_time=rule["end_time"]
-            )
+    booking_page = create_booking_page(request.user, {**source, "name": name, "location": location}, generate_public_urls(1)[0])
     
-    del request.session["setting"]
+    clear_draft(request.user)
 
     return booking_page
 
@@ -336,11 +351,7 @@ def add_setting_item(request, mode, section, booking_page_id=None):
             for k, v in form.cleaned_data.items()
         }
         
-        setting = request.session.get("setting", {})
-        items = setting.get(config["session_key"], [])
-        items.append(cleaned_data)
-        setting[config["session_key"]] = items
-        request.session["setting"] = setting
+        setting = append_draft_item(request.user, config["session_key"], cleaned_data)
 
         return render(request, config["template"], {
             "mode": "create",
@@ -350,19 +361,19 @@ def add_setting_item(request, mode, section, booking_page_id=None):
         })
     
     else:
-        booking_page = get_object_or_404(BookingPage, id=booking_page_id)
+        booking_page = load_booking_page(request, booking_page_id)
 
         if section == "special_exceptions":
-            form = form_class(request.POST, courts=booking_page.courts.all())
+            courts = booking_page.courts.all()
+            form = form_class(request.POST, courts=courts)
             if not form.is_valid():
                 return HttpResponseBadRequest("Invalid input")
-            
-            court = get_object_or_404(Court, id=form.cleaned_data["court"], booking_page=booking_page)
-            
+
+            court = next((court for court in courts if str(court.id) == form.cleaned_data["court"]), None)
+            if not court:
+                raise Http404("Court not found")
+
             config["model"].objects.create(court=court, **{k: v for k, v in form.cleaned_data.items() if k != "court"})
-            items = []
-            for court in booking_page.courts.all():
-                items.extend(court.special_exceptions.all())
 
         else:
             form = form_class(request.POST)
@@ -375,15 +386,9 @@ def add_setting_item(request, mode, section, booking_page_id=None):
             }
             
             config["model"].objects.create(booking_page=booking_page, **cleaned_data)
-            items = getattr(booking_page, config["db_field"]).all()
-        
-        return render(request, config["template"], {
-            "mode": "edit",
-            "section": section,
-            "setting": {section: items},
-            "form": form_class(),
-            "booking_page": booking_page
-        })
+
+        booking_page.refresh_from_db(fields=["version"])
+        return HttpResponse(render_list_fragment(request, booking_page, section))
 
 @login_required
 def delete_setting_item(request, mode, section, index=None, booking_page_id=None, object_id=None):
@@ -395,13 +400,10 @@ def delete_setting_item(request, mode, section, index=None, booking_page_id=None
         return HttpResponseBadRequest("Invalid setting type")
 
     if mode == "create":
-        setting = request.session.get("setting", {})
-        items = setting.get(config["session_key"], [])
-
-        if index is not None and 0 <= index < len(items):
-            items.pop(index)
-            setting[config["session_key"]] = items
-            request.session["setting"] = setting
+        if index is not None:
+            setting = remove_draft_item(request.user, config["session_key"], index)
+        else:
+            setting = get_draft(request.user)
 
         return render(request, config["template"], {
             "mode": "create",
@@ -410,26 +412,55 @@ def delete_setting_item(request, mode, section, index=None, booking_page_id=None
         })
 
     else:
-        booking_page = get_object_or_404(BookingPage, id=booking_page_id)
+        booking_page = load_booking_page(request, booking_page_id)
 
         if section == "special_exceptions":
-            obj = SpecialException.objects.filter(id=object_id).first()
-            if not obj:
-                return HttpResponseBadRequest("Item not found")
-            obj.delete()
-            items = []
-            for court in booking_page.courts.all():
-                items.extend(court.special_exceptions.all())
+            obj = SpecialException.objects.filter(id=object_id, court__booking_page=booking_page).first()
         else:
             obj = getattr(booking_page, config["db_field"]).filter(id=object_id).first()
-            if not obj:
-                return HttpResponseBadRequest("Item not found")
-            obj.delete()
-            items = getattr(booking_page, config["db_field"]).all()
+        if not obj:
+            return HttpResponseBadRequest("Item not found")
+        obj.delete()
 
-        return render(request, config["template"], {
-            "mode": "edit",
-            "booking_page": booking_page,
-            "section": section,
-            "setting": {section: items}
-        })
\ No newline at end of file
+        booking_page.refresh_from_db(fields=["version"])
+        return HttpResponse(render_list_fragment(request, booking_page, section))
+
+@login_required
+def import_setting(request):
+    context = {}
+
+    if request.method == "POST":
+        upload = request.FILES.get("file")
+        if not upload:
+            context["error"] = "Please choose a JSON or CSV file."
+        else:
+            file_format = "csv" if upload.name.lower().endswith(".csv") else "json"
+            try:
+                pages = parse_booking_pages(upload.read(), file_format)
+            except (ValueError, UnicodeDecodeError, json.JSONDecodeError):
+                context["error"] = "The file could not be read."
+            else:
+                created, errors = import_booking_pages(request.user, pages)
+                context["created"] = created
+                context["errors"] = errors
+
+    return render(request, "booking_page/import.html", context)
+
+@login_required
+def import_holiday_exceptions(request, booking_page_id):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid request method")
+
+    upload = request.FILES.get("file")
+    if not upload:
+        return HttpResponseBadRequest("Invalid input")
+
+    booking_page = load_booking_page(request, booking_page_id)
+    booking_pages = request.user.booking_pages.all() if request.POST.get("all_pages") else [booking_page]
+    try:
+        import_holidays(booking_pages, upload)
+    except UnicodeDecodeError:
+        return HttpResponseBadRequest("Invalid input")
+
+    booking_page.refresh_from_db(fields=["version"])
+    return HttpResponse(render_list_fragment(request, booking_page, "holiday_exceptions"))
\ No newline at end of file
@@ -0,0 +1,22 @@
+from core.utils.stripe_events import store_event
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
+import json
+import stripe
+
+@csrf_exempt
+def stripe_webhook(request):
+    if request.method != "POST":
+        return HttpResponseBadRequest("Invalid request method")
+
+    try:
+        stripe.Webhook.construct_event(request.body, request.headers.get("Stripe-Signature", ""), settings.STRIPE_WEBHOOK_SECRET)
+    except (ValueError, stripe.SignatureVerificationError):
+        return HttpResponseBadRequest("Invalid signature")
+
+    # Only record the event here; drain_stripe_events applies it to bookings,
+    # so Stripe gets its 200 without waiting on booking-table locks.
+    store_event(json.loads(request.body))
+
+    return HttpResponse(status=200)
@@ -0,0 +1,39 @@
+# Gunicorn worker profile, picked up automatically from the project root.
+#
+# ASGI (default): uvicorn workers serve config.asgi. The public booking page,
+# availability API and checkout creation are async views, so one worker keeps
+# many requests in flight while they wait on Stripe or the database.
+#
+#     gunicorn config.asgi:application
+#
+# WSGI: threaded sync workers serve config.wsgi, each thread holding one
+# request from start to finish. Async views still work, one event loop per
+# request.
+#
+#     GUNICORN_WORKER_CLASS=gthread gunicorn config.wsgi:application
+#
+# Compare both with `python manage.py bench_serving`.
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn_worker.UvicornWorker")
+
+# Async workers are bound by CPU rather than by waiting requests, so one per
+# core is enough; sync workers need more processes and threads to cover I/O.
+if worker_class == "gthread":
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", "4"))
+else:
+    workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks never accumulate.
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = "-"